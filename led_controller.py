@@ -1,18 +1,117 @@
+import asyncio
+import contextlib
+import queue
+import select
 import socket
+import sys
 import json
-from typing import Dict, Optional, List, Any, Tuple
+from types import MappingProxyType
+from typing import Dict, Optional, List, Any, Tuple, NamedTuple, Mapping
 import time
+import functools
+import itertools
+import threading
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Optional: much faster JSON encoding/decoding of Hyperion messages
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# JSON (de)serialization for the wire: bytes out, bytes in
+if orjson is not None:
+    def _json_line(obj: Any) -> bytes:
+        """Encodes obj as one newline-terminated JSON line (the newline is added by orjson itself)."""
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    _json_loads = orjson.loads  # Raises orjson.JSONDecodeError, a json.JSONDecodeError subclass
+else:
+    # One reusable encoder; compact separators keep the command lines short
+    _ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def _json_line(obj: Any) -> bytes:
+        """Encodes obj as one newline-terminated JSON line, from a byte template where one fits."""
+        if type(obj) is dict:
+            line = _template_line(obj)
+            if line is not None:
+                return line
+        return (_ENCODER(obj) + "\n").encode('utf-8')
+    _json_loads = json.loads
+
+    @functools.lru_cache(maxsize=64)
+    def _json_str(value: str) -> bytes:
+        """A JSON-encoded string; memoized, as only a few (command names, origins, tokens) occur."""
+        return _ENCODER(value).encode('utf-8')
+
+    def _template_line(command_obj: Dict) -> Optional[bytes]:
+        """
+        Encodes the most frequent commands (serverinfo, adjustment, color and componentstate, as
+        built by LEDController) by filling in byte templates, exactly as _ENCODER would.
+        Returns None for anything else.
+        """
+        keys = tuple(command_obj)
+        token = b""
+        if "token" in command_obj:
+            if keys[-2:] != ("token", "tan") or type(command_obj["token"]) is not str:
+                return None
+            token = b',"token":' + _json_str(command_obj["token"])
+            keys = keys[:-2] + ("tan",)
+        tan = command_obj.get("tan")
+        if type(tan) is not int or type(command_obj.get("command")) is not str:
+            return None
+
+        if keys == ("command", "tan"):
+            return b'{"command":%s%s,"tan":%d}\n' % (_json_str(command_obj["command"]), token, tan)
+        if keys == ("command", "adjustment", "tan") and command_obj["command"] == "adjustment":
+            adjustment = command_obj["adjustment"]
+            if type(adjustment) is dict and len(adjustment) == 1 and type(adjustment.get("brightness")) is int:
+                return b'{"command":"adjustment","adjustment":{"brightness":%d}%s,"tan":%d}\n' % (
+                    adjustment["brightness"], token, tan)
+        elif keys == ("command", "color", "priority", "origin", "tan") and command_obj["command"] == "color":
+            color = command_obj["color"]
+            if type(color) in (tuple, list) and len(color) == 3 and all(type(v) is int for v in color) \
+               and type(command_obj["priority"]) is int and type(command_obj["origin"]) is str:
+                return b'{"command":"color","color":[%d,%d,%d],"priority":%d,"origin":%s%s,"tan":%d}\n' % (
+                    color[0], color[1], color[2], command_obj["priority"], _json_str(command_obj["origin"]),
+                    token, tan)
+        elif keys == ("command", "componentstate", "tan") and command_obj["command"] == "componentstate":
+            componentstate = command_obj["componentstate"]
+            if type(componentstate) is dict and tuple(componentstate) == ("component", "state") \
+               and type(componentstate["component"]) is str and type(componentstate["state"]) is bool:
+                return b'{"command":"componentstate","componentstate":{"component":%s,"state":%s}%s,"tan":%d}\n' % (
+                    _json_str(componentstate["component"]), b"true" if componentstate["state"] else b"false",
+                    token, tan)
+        return None
+
+def _command_lines(commands: List[Dict]) -> List[bytes]:
+    """The JSON lines for one write of commands; written with a gathering send, so never joined."""
+    return list(map(_json_line, commands))
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # Not on Windows
+
+def _iov_max() -> int:
+    """How many buffers one sendmsg() call may gather (IOV_MAX), at least the POSIX minimum of 16."""
+    try:
+        return max(16, os.sysconf("SC_IOV_MAX"))
+    except (AttributeError, ValueError, OSError):
+        return 16
+
+_IOV_MAX = _iov_max()
+
 # --- Configuration for Hyperion ---
 HYPERION_DEFAULT_PORT = 19444
 HYPERION_DEFAULT_PRIORITY = 50  # Docs recommend 50 for apps
 HYPERION_COMPONENT_LEDDEVICE = "LEDDEVICE"
 HYPERION_ORIGIN_NAME = "LEDController"  # Min 4, Max 20 chars for origin
 
-WLED_TO_HYPERION_EFFECT_MAP: Dict[int, str] = {
+def _freeze_effect_map(effect_map: Dict[int, str]) -> Mapping[int, str]:
+    """Makes the effect map read-only, interning the names sent in every effect command."""
+    return MappingProxyType({k: sys.intern(v) for k, v in effect_map.items()})
+
+WLED_TO_HYPERION_EFFECT_MAP: Mapping[int, str] = _freeze_effect_map({
     # 0: "Solid" - Intentionally left out, recommend using controller.set_color()
     #            or map to a generic mood blob if a default "on" effect is desired
     # 0: "Warm mood blobs", # Example if you want set_effect(0) to do *something*
@@ -71,9 +170,9 @@ WLED_TO_HYPERION_EFFECT_MAP: Dict[int, str] = {
     180: "Plasma",      # Hiphotic
     183: "Atomic swirl",# Black Hole (approximation)
     184: "Waves with Color", # Wavesins
-}
+})
 
-WLED_TO_HYPERION_PRESET_MAP: Dict[int, Dict[str, Any]] = {
+WLED_TO_HYPERION_PRESET_MAP: Mapping[int, Dict[str, Any]] = MappingProxyType({
     1: {
         "type": "effect",
         "name": "Preset01",
@@ -87,28 +186,399 @@ WLED_TO_HYPERION_PRESET_MAP: Dict[int, Dict[str, Any]] = {
         "args": {
         }
     },
-}
+})
+
+# Reverse lookups from what Hyperion reports as visible back to the WLED preset ID,
+# built once at import. The first preset ID listed wins if several map to the same target.
+_PRESET_REVERSE_EFFECT: Dict[str, int] = {}  # Effect name -> WLED preset ID
+_PRESET_REVERSE_COLOR: Dict[Tuple[int, ...], int] = {}  # RGB -> WLED preset ID
+for _wled_pid, _preset_action_def in WLED_TO_HYPERION_PRESET_MAP.items():
+    if _preset_action_def["type"] == "effect":
+        _preset_action_def["name"] = sys.intern(_preset_action_def["name"])
+        _PRESET_REVERSE_EFFECT.setdefault(_preset_action_def["name"], _wled_pid)
+    elif _preset_action_def["type"] == "color":
+        _PRESET_REVERSE_COLOR.setdefault(tuple(_preset_action_def["rgb"]), _wled_pid)
+del _wled_pid, _preset_action_def
+
+# The effect and preset maps as tables indexed by WLED ID 0-255 (None where unmapped);
+# the maps stay the source of truth, see _lut_get()
+_EFFECT_LUT: Tuple[Optional[str], ...] = tuple(WLED_TO_HYPERION_EFFECT_MAP.get(i) for i in range(256))
+_PRESET_LUT: Tuple[Optional[Dict[str, Any]], ...] = tuple(WLED_TO_HYPERION_PRESET_MAP.get(i) for i in range(256))
+
+# WLED 0-255 value lookup tables, precomputed at import
+# Effect speed (sx) / intensity (ix) example scaling: WLED 0-255 -> Hyperion 0.1-2.0 (adjust as needed)
+_SX_SCALE: Tuple[float, ...] = tuple(max(0.1, i / 128.0) for i in range(256))
+# Brightness: WLED 0-255 -> Hyperion 0-100
+_BRI_WLED_TO_HYP: Tuple[int, ...] = tuple(max(0, min(100, round((i / 255.0) * 100))) for i in range(256))
+# set_brightness() state_params per valid value; shared, so never modified
+_BRI_STATE_PARAMS: Tuple[Dict[str, int], ...] = tuple({"bri": i} for i in range(256))
+
+# (message label, min, max) for set_effect()'s speed, intensity, brightness, palette, w and w2
+_EFFECT_RANGE_CHECKS: Tuple[Tuple[str, int, int], ...] = (
+    ("Speed", 0, 255),
+    ("Intensity", 0, 255),
+    ("Brightness", 0, 255),
+    ("Palette index", 0, 46), # Original WLED validation for its palettes
+    ("Primary white value", 0, 255),
+    ("Secondary white value", 0, 255),
+)
+
+def _scale_effect_arg(value: Any) -> float:
+    """Scales a WLED speed/intensity value to a Hyperion effect arg via _SX_SCALE."""
+    if isinstance(value, int) and 0 <= value <= 255:
+        return _SX_SCALE[value]
+    return max(0.1, value / 128.0) # Outside the table (e.g. raw state_params); same scaling
+
+@functools.lru_cache(maxsize=256)
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert hex color string (e.g., '#FF0000') to RGB tuple. Memoized, as callers reuse a few colors."""
+    hex_digits = hex_color.lstrip('#')
+    if len(hex_digits) != 6:
+        raise ValueError("Hex color must be 6 characters long (without #)")
+    rgb = tuple(bytes.fromhex(hex_digits))  # Raises ValueError on non-hex characters
+    if len(rgb) != 3: # fromhex() skips whitespace
+        raise ValueError(f"Invalid hex color: '{hex_color}'")
+    return rgb
+
+# Warm the cache with the colors used by the effect_* helpers and the example below
+for _hex_color in ("#ffa000", "#000000", "#08ff00", "#00FFFF", "#FF00FF", "#FF0000"):
+    _hex_to_rgb(_hex_color)
+del _hex_color
+
+@functools.lru_cache(maxsize=16)
+def _brightness_table(brightness: int) -> bytes:
+    """bytes.translate() table scaling 0-255 channel values by brightness/255. Memoized per brightness."""
+    return bytes(v * brightness // 255 for v in range(256))
+
+def _lut_get(lut: Tuple[Any, ...], mapping: Mapping, wled_id: Any) -> Any:
+    """lut[wled_id] for IDs the table covers, otherwise a lookup in the map it was built from."""
+    if type(wled_id) is int and 0 <= wled_id < 256:
+        return lut[wled_id]
+    return mapping.get(wled_id)
+
+def _is_toggle(state_params: Optional[Dict]) -> bool:
+    """True if WLED-style state_params ask to toggle power ("on": "t")."""
+    power_val = state_params.get("on") if state_params else None
+    return isinstance(power_val, str) and power_val.lower() == "t"
+
+def _check_duration(duration: Any) -> int:
+    """Validates a Hyperion command duration in milliseconds."""
+    if isinstance(duration, bool) or not isinstance(duration, int) or duration <= 0:
+        raise ValueError("Duration must be a positive number of milliseconds")
+    return duration
+
+class _ServerInfoIndex(NamedTuple):
+    """The parts of a Hyperion serverinfo response the adapter reads, indexed once."""
+    components_by_name: Dict[str, Dict]
+    brightness: int  # Hyperion 0-100
+    visible_priority: Optional[Dict]  # Priority source currently shown on the LEDs
+
+def _index_serverinfo(info: Dict) -> _ServerInfoIndex:
+    """Builds a _ServerInfoIndex from a serverinfo 'info' object."""
+    components_by_name = {c.get("name"): c for c in info.get("components", [])}
+
+    # Find the brightness adjustment. Usually in the first/default adjustment object.
+    brightness = 100 # Default if not found
+    adjustments_list = info.get("adjustment", []) # serverinfo.adjustment is a list
+    if isinstance(adjustments_list, list):
+        brightness = next((adj["brightness"] for adj in adjustments_list if "brightness" in adj), 100)
+
+    # Find the source that is currently visible on the LEDs
+    visible_priority = next((p for p in info.get("priorities", []) if p.get("visible")), None)
+    return _ServerInfoIndex(components_by_name, brightness, visible_priority)
+
+# TCP keepalive for idle connections: first probe after 30 s, then every 10 s, dropped after 3 missed.
+# (option names, in order of preference; macOS calls the idle time TCP_KEEPALIVE)
+_KEEPALIVE_OPTIONS: Tuple[Tuple[Tuple[str, ...], int], ...] = (
+    (("TCP_KEEPIDLE", "TCP_KEEPALIVE"), 30),
+    (("TCP_KEEPINTVL",), 10),
+    (("TCP_KEEPCNT",), 3),
+)
+
+def _configure_socket(sock: socket.socket) -> None:
+    """Socket options for connections to Hyperion, shared by the sync and async controllers."""
+    # Commands are small JSON lines; don't let Nagle hold them back waiting for ACKs
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Keep idle pooled connections alive through NAT/firewall timeouts, and notice dead peers
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option_names, value in _KEEPALIVE_OPTIONS:
+        option = next((getattr(socket, name) for name in option_names if hasattr(socket, name)), None)
+        if option is not None:  # Not available on every platform (e.g. older Windows)
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+            except OSError:
+                pass
+
+class _HyperionConnection:
+    """A TCP connection to Hyperion's JSON server, with its receive buffer."""
+
+    def __init__(self, host: str, port: int, timeout: float = 3.0):
+        self.address = (host, port)
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            _configure_socket(s)
+            s.settimeout(timeout)  # Connection timeout; exchanges limit themselves, see _wait_until()
+            s.connect((host, port))
+        except OSError:
+            s.close()
+            raise
+        self.sock = s
+        self.recv_buffer = bytearray()  # Data received past the last complete response line
+        self.recv_chunk = memoryview(bytearray(65536))  # Reused recv_into() target
+        self.closed = False
+        self.reused = False  # Set once the pool hands the connection out again
+
+    def is_reusable(self) -> bool:
+        """Health check for an idle connection: still open, with nothing left unread."""
+        if self.closed or self.recv_buffer:
+            return False
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable  # An idle socket turning readable means EOF (or stray data)
+
+    def _wait_until(self, deadline: float) -> None:
+        """Limits the next blocking socket call to the time left until deadline (time.monotonic())."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("timed out")
+        self.sock.settimeout(remaining)
+
+    def send(self, chunks: List[bytes], deadline: float) -> None:
+        """
+        Writes the chunks back to back, gathered by the kernel (sendmsg, up to IOV_MAX chunks
+        per call) rather than joined first where possible. Raises socket.timeout if that isn't
+        done by deadline.
+        """
+        if len(chunks) == 1 or not _HAS_SENDMSG:
+            self._wait_until(deadline)
+            self.sock.sendall(chunks[0] if len(chunks) == 1 else b"".join(chunks))  # Timeout covers it all
+            return
+        buffers = [memoryview(chunk) for chunk in chunks]
+        first = 0  # Index of the first buffer not fully sent
+        while first < len(buffers):
+            self._wait_until(deadline)
+            sent = self.sock.sendmsg(buffers[first:first + _IOV_MAX])  # More fail with EMSGSIZE
+            # Skip what went out; a partially sent chunk keeps its unsent tail
+            while sent:
+                if sent >= len(buffers[first]):
+                    sent -= len(buffers[first])
+                    first += 1
+                else:
+                    buffers[first] = buffers[first][sent:]
+                    sent = 0
+
+    def read_lines(self, count: int, deadline: float) -> List[bytearray]:
+        """
+        Reads up to `count` newline-terminated responses, keeping any surplus for the next read.
+        Returns fewer lines only if the peer closed the connection. Raises socket.timeout if
+        they haven't all arrived by deadline, however slowly the data trickles in.
+        """
+        buffer = self.recv_buffer
+        lines: List[bytearray] = []
+        start = 0  # Start of the line being read
+        scan_from = 0  # Everything before this has already been searched for a newline
+        while len(lines) < count:
+            newline = buffer.find(b"\n", scan_from)
+            if newline >= 0:
+                lines.append(buffer[start:newline])
+                start = scan_from = newline + 1
+                continue
+            scan_from = len(buffer)
+            self._wait_until(deadline)
+            received = self.sock.recv_into(self.recv_chunk)
+            if not received:  # Connection closed by peer, possibly mid-response
+                self.close()
+                return lines
+            buffer += self.recv_chunk[:received]
+        del buffer[:start]
+        return lines
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+class _HyperionPool:
+    """
+    Idle Hyperion connections kept open per (host, port) and shared by every
+    LEDController, so controllers for one or several Hyperion instances reuse
+    warm sockets. At most max_per_host idle connections are kept per host.
+    """
+
+    def __init__(self, max_per_host: int = 2):
+        self.max_per_host = max_per_host
+        self._pools: Dict[Tuple[str, int], queue.LifoQueue] = {}
+        self._lock = threading.Lock()
+
+    def _idle(self, host: str, port: int) -> queue.LifoQueue:
+        with self._lock:
+            idle = self._pools.get((host, port))
+            if idle is None:
+                idle = self._pools[(host, port)] = queue.LifoQueue(maxsize=self.max_per_host)
+            return idle
+
+    def acquire(self, host: str, port: int, timeout: float = 3.0) -> _HyperionConnection:
+        """Takes a healthy idle connection to host:port, or opens a new one."""
+        idle = self._idle(host, port)
+        while True:
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                return _HyperionConnection(host, port, timeout)
+            if conn.is_reusable():
+                return conn
+            conn.close()
+
+    def release(self, conn: _HyperionConnection) -> None:
+        """Gives back a connection after a complete exchange."""
+        if conn.closed:
+            return
+        conn.reused = True
+        try:
+            self._idle(*conn.address).put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_idle(self, host: str, port: int) -> None:
+        """Closes the idle connections to host:port."""
+        idle = self._idle(host, port)
+        while True:
+            try:
+                idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_POOL = _HyperionPool()
 
 class LEDController:
-    def __init__(self, ip_address: Optional[str] = None, port: int = HYPERION_DEFAULT_PORT):
+    DEBOUNCE_DELAY = 0.02  # Seconds queued (flush=False) updates wait for newer ones before sending
+    MAX_FAILURE_BACKOFF = 60.0  # Upper bound (seconds) for the circuit breaker's doubling pause
+
+    def __init__(self, ip_address: Optional[str] = None, port: int = HYPERION_DEFAULT_PORT,
+                 status_ttl: float = 0.5, timeout: float = 3.0,
+                 failure_threshold: int = 3, failure_backoff: float = 5.0):
         self.ip_address = ip_address
         self.port = port
         self.priority = HYPERION_DEFAULT_PRIORITY
         self.auth_token: Optional[str] = None
         self.origin = HYPERION_ORIGIN_NAME  # Origin for commands sent to Hyperion
+        self._tan_counter = itertools.count(1)  # Source of command tans, see _next_tan()
+        # (monotonic timestamp, enabled) of the last known LEDDEVICE state
+        self._led_on_cache: Optional[Tuple[float, bool]] = None
+        # "on", "bri_wled" and "preset_id" as last written to or reported by Hyperion
+        self._last_known: Dict[str, Any] = {}
+        # check_wled_status() answers from its last result for status_ttl seconds (0 disables);
+        # any command sent through the controller drops it
+        self.status_ttl = status_ttl
+        self.timeout = timeout  # Seconds allowed to connect, and for each exchange of commands and responses
+        # Circuit breaker: after failure_threshold consecutive calls failing to reach Hyperion (0 disables),
+        # calls fail fast for failure_backoff seconds, doubling while the next attempt fails as well
+        self.failure_threshold = failure_threshold
+        self.failure_backoff = failure_backoff
+        self._failures = 0
+        self._trips = 0  # Times the breaker opened since the last success
+        self._open_until = 0.0  # time.monotonic() until which the breaker is open
+        self._status_cache: Optional[Tuple[float, Dict]] = None
+        # Queued WLED-style state_params from flush=False calls, merged until the timer fires
+        self._pending: Dict[str, Any] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._pending_lock = threading.Lock()
+        self._corked = 0  # Nesting depth of cork() blocks; while > 0 updates are only queued
 
     def set_ip(self, ip_address: str, port: Optional[int] = None) -> None:
         """Update the Hyperion IP address and optionally the port."""
         self.ip_address = ip_address
         if port is not None:
             self.port = port
+        # What we knew was about the old address
+        self._led_on_cache = None
+        self._last_known = {}
+        self._status_cache = None
+        self._failures = self._trips = 0
+        self._open_until = 0.0
+
+    @property
+    def last_is_on(self) -> Optional[bool]:
+        """Whether the LEDs were on as of the last command or status check, None if unknown. No I/O."""
+        cached = self._led_on_cache
+        return cached[1] if cached is not None else None
 
     def set_auth_token(self, token: str) -> None:
         """Set authentication token if Hyperion requires it."""
         self.auth_token = token
 
+    def _connection_failed(self, conn: Optional[_HyperionConnection]) -> None:
+        """Drops a connection after a socket or framing error so it isn't reused."""
+        self._led_on_cache = None  # Can't trust cached state across a connection problem
+        self._last_known = {}
+        self._status_cache = None
+        if conn is not None:
+            conn.close()
+
+    def _breaker_message(self) -> Optional[str]:
+        """Why calls fail without touching the network while the circuit breaker is open, else None."""
+        if self.failure_threshold and self._failures >= self.failure_threshold:
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0:
+                return f"Hyperion at {self.ip_address}:{self.port} is unreachable, not retrying for {remaining:.1f}s"
+            # Otherwise let this call through as a probe; if it fails, the breaker opens again
+        return None
+
+    def _breaker_status(self) -> Optional[Dict]:
+        """The status to return without touching the network while the circuit breaker is open, else None."""
+        message = self._breaker_message()
+        return None if message is None else {"connected": False, "message": f"Cannot connect to Hyperion: {message}"}
+
+    def _failure_status(self, e: Exception) -> Dict:
+        """
+        Like _error_status(), but also counts a connection failure towards the circuit breaker.
+        Must be called from the except block handling it.
+        """
+        if isinstance(e, (OSError, json.JSONDecodeError)):
+            self._record_failure()
+        return self._error_status(e)
+
+    def _record_failure(self) -> None:
+        """Counts a failed call, opening the circuit breaker once there are enough in a row."""
+        self._failures += 1
+        now = time.monotonic()
+        if self.failure_threshold and self._failures >= self.failure_threshold and now >= self._open_until:
+            # Not already open (concurrent calls failing together count once)
+            self._trips += 1
+            backoff = min(self.failure_backoff * 2 ** (self._trips - 1), self.MAX_FAILURE_BACKOFF)
+            self._open_until = now + backoff
+            logger.warning("Hyperion at %s:%s failed %d times in a row, pausing commands for %.1fs",
+                           self.ip_address, self.port, self._failures, backoff)
+
+    def close(self) -> None:
+        """
+        Close the idle connections to this Hyperion (shared with other controllers for the
+        same address). Connections are reopened automatically on the next command.
+        """
+        self.flush()  # Don't lose queued updates
+        self._led_on_cache = None
+        if self.ip_address:
+            _POOL.close_idle(self.ip_address, self.port)
+
+    def __enter__(self) -> "LEDController":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _next_tan(self) -> int:
+        """Returns the next command tan: unique per connection and increasing (wraps at 16 bits)."""
+        return next(self._tan_counter) & 0xFFFF
+
     def _send_hyperion_command(self, command_obj: Dict) -> Optional[Dict]:
-        """Sends a command to Hyperion via TCP socket and returns the JSON response."""
+        """
+        Sends a command to Hyperion over the persistent TCP connection and returns the JSON response.
+        A "tan" already set on command_obj is kept, so callers can correlate responses themselves.
+        """
         if not self.ip_address:
             # This will be caught by the calling method (_send_command)
             raise ValueError("No Hyperion IP configured")
@@ -118,385 +588,543 @@ class LEDController:
             command_obj["token"] = self.auth_token
         
         # Add tan for synchronous response if not already present (good practice)
-        if "tan" not in command_obj:
-            # Generate a somewhat unique tan; simple epoch ms % range
-            command_obj["tan"] = int(time.time() * 1000) % 100000
+        command_obj.setdefault("tan", self._next_tan())
+
+        return self._exchange([command_obj])[0]
 
-        full_request = json.dumps(command_obj) + "\n"
+    def _send_hyperion_batch(self, commands: List[Dict]) -> List[Dict]:
+        """
+        Sends several commands to Hyperion in a single write and returns their
+        responses in the same order as the commands. Each command is given a
+        fresh tan (replacing any set by the caller) to match up the responses.
+        """
+        if not commands:
+            return []
+        if not self.ip_address:
+            raise ValueError("No Hyperion IP configured")
+
+        for command_obj in commands:
+            if self.auth_token:
+                command_obj["token"] = self.auth_token
+            # Distinct tans let each response be matched back to its command
+            command_obj["tan"] = self._next_tan()
+
+        return self._exchange(commands)
+
+    def _exchange(self, commands: List[Dict]) -> List[Dict]:
+        """Writes the prepared commands in one go and reads back one JSON response per command."""
+        request_lines = _command_lines(commands)
+        response_data = b""
+        conn = None
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(3)  # Connection and read timeout
-                s.connect((self.ip_address, self.port))
-                s.sendall(full_request.encode('utf-8'))
-
-                response_data = ""
-                buffer = ""
-                # Hyperion sends line-separated JSON. Read until a full JSON object is likely received.
-                while True:
-                    chunk = s.recv(4096).decode('utf-8', errors='ignore')
-                    if not chunk:  # Connection closed by peer
-                        break
-                    buffer += chunk
-                    if "\n" in buffer:  # Assuming one JSON response per command, ending with newline
-                        response_data = buffer.split("\n", 1)[0]
-                        break # Got a full line / complete JSON message
-                
+            conn, lines = self._roundtrip(request_lines, len(commands))
+
+            # Hyperion sends line-separated JSON, one response per command in the order received.
+            responses = []
+            for command_obj in commands:
+                response_data = lines[len(responses)] if len(responses) < len(lines) else b""
                 if not response_data.strip():
-                    logger.error(f"No response data received from Hyperion for command: {command_obj.get('command')}")
+                    logger.error("No response data received from Hyperion for command: %s", command_obj.get('command'))
                     # This case indicates a problem, as Hyperion should always send a JSON response.
                     raise json.JSONDecodeError("No response data from Hyperion", "", 0)
-
-                response_json = json.loads(response_data.strip())
-                
-                # Log if Hyperion command itself was not successful
-                if not response_json.get("success", False):
-                    error_info = response_json.get("error", "Unknown error from Hyperion")
-                    logger.error(
-                        f"Hyperion command failed: {command_obj.get('command')} - "
-                        f"Error: '{error_info}'. Request: {json.dumps(command_obj)}"
-                    )
-                    # The calling function (_send_command) will use this to format its return dict
-                return response_json
+                responses.append(_json_loads(response_data))
+            _POOL.release(conn)
 
         except socket.timeout:
-            logger.error(f"Timeout connecting/reading from Hyperion at {self.ip_address}:{self.port}")
+            self._connection_failed(conn)
+            logger.error("Timeout connecting/reading from Hyperion at %s:%s", self.ip_address, self.port)
             raise ConnectionError(f"Timeout communicating with Hyperion at {self.ip_address}:{self.port}")
         except ConnectionRefusedError:
-            logger.error(f"Connection refused by Hyperion at {self.ip_address}:{self.port}")
+            self._connection_failed(conn)
+            logger.error("Connection refused by Hyperion at %s:%s", self.ip_address, self.port)
             raise ConnectionRefusedError(f"Connection refused by Hyperion at {self.ip_address}:{self.port}")
         except OSError as e:  # Other socket errors (e.g., host not found, network unreachable)
-            logger.error(f"Socket OS error with Hyperion: {e}")
+            self._connection_failed(conn)
+            logger.error("Socket OS error with Hyperion: %s", e)
             raise ConnectionError(f"Socket OS error with Hyperion: {e}")
         except json.JSONDecodeError as e:
-            logger.error(f"Error parsing Hyperion response: {e}. Received data: '{response_data[:200]}'")
+            # Framing is no longer trustworthy on this connection; start fresh next time
+            self._connection_failed(conn)
+            logger.error("Error parsing Hyperion response: %s. Received data: '%r'", e, response_data[:200])
             raise # Re-raise to be caught by _send_command
 
+        # Match responses to commands by tan, falling back to arrival order
+        responses_by_tan = {r.get("tan"): r for r in responses}
+        ordered = [responses_by_tan.get(c.get("tan"), r) for c, r in zip(commands, responses)]
+        self._log_failed_commands(commands, ordered)
+        return ordered
+
+    def _roundtrip(self, request: List[bytes], count: int) -> Tuple[_HyperionConnection, List[bytearray]]:
+        """
+        Writes the request lines on a pooled connection and reads up to count response lines.
+        If a reused connection turns out to have been closed by Hyperion in the meantime (the
+        write fails or nothing at all comes back), the request is retried once on a new connection.
+        """
+        deadline = time.monotonic() + self.timeout
+        conn = _POOL.acquire(self.ip_address, self.port, self.timeout)
+        while True:
+            try:
+                conn.send(request, deadline)
+                lines = conn.read_lines(count, deadline)
+            except (BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if not conn.reused:
+                    raise
+                lines = []
+            except BaseException:
+                conn.close()
+                raise
+            if lines or not conn.closed or conn.recv_buffer or not conn.reused:
+                return conn, lines
+            logger.debug("Idle connection to Hyperion at %s:%s was closed, reconnecting", self.ip_address, self.port)
+            _POOL.close_idle(self.ip_address, self.port)  # Likely closed as well
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("No time left to reconnect")
+            conn = _HyperionConnection(self.ip_address, self.port, remaining)  # Within the same deadline
+
+    @staticmethod
+    def _log_failed_commands(commands: List[Dict], responses: List[Dict]) -> None:
+        """Logs each command that Hyperion reported as unsuccessful."""
+        for command_obj, response_json in zip(commands, responses):
+            # Log if Hyperion command itself was not successful
+            # (only pay for serializing the request if the record will actually be emitted)
+            if not response_json.get("success", False) and logger.isEnabledFor(logging.ERROR):
+                error_info = response_json.get("error", "Unknown error from Hyperion")
+                logger.error(
+                    "Hyperion command failed: %s - Error: '%s'. Request: %s",
+                    command_obj.get('command'), error_info, json.dumps(command_obj)
+                )
+                # The calling function (_send_command) will use this to format its return dict
+
     def _get_hyperion_serverinfo(self) -> Optional[Dict]:
         """Fetches the 'serverinfo' from Hyperion."""
         try:
             response = self._send_hyperion_command({"command": "serverinfo"})
             return response.get("info") if response and response.get("success") else None
         except Exception as e: # Catch exceptions from _send_hyperion_command
-            logger.warning(f"Could not get Hyperion serverinfo: {e}")
+            logger.warning("Could not get Hyperion serverinfo: %s", e)
             return None
 
+    def _get_led_on_state(self, max_age: float = 0.5) -> Optional[bool]:
+        """
+        Returns whether Hyperion's LEDDEVICE is on, reusing a cached state younger
+        than max_age seconds. Returns None if the state could not be fetched.
+        """
+        cached = self._led_on_cache
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        return self._led_state_from_serverinfo(self._get_hyperion_serverinfo())
+
+    def _led_state_from_serverinfo(self, server_info: Optional[Dict]) -> Optional[bool]:
+        """Reads the LEDDEVICE state from a serverinfo 'info' object, remembering the rest of it too."""
+        if server_info is None:
+            self._led_on_cache = None
+            return None
+        return self._remember_serverinfo(server_info)["on"]
+
+    def _remember_led_state(self, commands: List[Dict], responses: List[Dict]) -> None:
+        """Updates the cached LEDDEVICE state from successful LEDDEVICE componentstate commands."""
+        for command_obj, response_json in zip(commands, responses):
+            if command_obj.get("command") == "componentstate" and response_json.get("success", False) \
+               and command_obj["componentstate"].get("component") == HYPERION_COMPONENT_LEDDEVICE:
+                # We just set it, no need to ask Hyperion again
+                self._led_on_cache = (time.monotonic(), bool(command_obj["componentstate"]["state"]))
+
     def _send_command(self, state_params: Dict = None) -> Dict:
         """
         Translates WLED-style state_params into Hyperion commands and
         returns a status dictionary in the WLED-like format.
         """
+        if not state_params:
+            return self.check_wled_status() # Nothing to send, just report the status
+        broken = self._breaker_status()
+        if broken is not None:
+            return broken # Hyperion has been failing, don't wait on another timeout
+        self._status_cache = None # About to change the state
         try:
             if not self.ip_address:
                 raise ValueError("No Hyperion IP configured")
 
             # --- Pre-command: Auto Power-On Logic (like WLED) ---
-            # Get current Hyperion LEDDEVICE state before sending new commands
-            server_info_before = self._get_hyperion_serverinfo()
-            is_hyperion_leddevice_on_before = False
-            if server_info_before:
-                for comp in server_info_before.get("components", []):
-                    if comp.get("name") == HYPERION_COMPONENT_LEDDEVICE:
-                        is_hyperion_leddevice_on_before = comp.get("enabled", False)
-                        break
-            
-            is_power_control_command = state_params is not None and "on" in state_params
-            is_visual_effect_command = state_params and any(k in state_params for k in ["bri", "seg", "ps"])
-
-            # If LEDDEVICE is off, and we are trying to set a visual (not just power), turn it on
-            if not is_hyperion_leddevice_on_before and state_params and \
-               is_visual_effect_command and not is_power_control_command:
-                logger.debug("Hyperion LEDDEVICE is off, attempting to turn on first.")
-                self._send_hyperion_command({
-                    "command": "componentstate",
-                    "componentstate": {"component": HYPERION_COMPONENT_LEDDEVICE, "state": True}
-                })
-                time.sleep(0.1) # Give Hyperion a moment to process the power-on
-
-            # --- Process state_params (WLED style) into Hyperion commands ---
-            if state_params:
-                # Power ("on")
-                if "on" in state_params:
-                    power_val = state_params["on"]
-                    target_leddevice_state = bool(power_val)
-                    if isinstance(power_val, str) and power_val.lower() == "t": # Toggle
-                        # Use the state fetched before, or fetch again if it was unavailable
-                        current_led_state_for_toggle = is_hyperion_leddevice_on_before
-                        if server_info_before is None: # If initial fetch failed
-                             current_info_for_toggle = self._get_hyperion_serverinfo()
-                             if current_info_for_toggle:
-                                 for comp in current_info_for_toggle.get("components", []):
-                                     if comp.get("name") == HYPERION_COMPONENT_LEDDEVICE:
-                                         current_led_state_for_toggle = comp.get("enabled", False)
-                                         break
-                        target_leddevice_state = not current_led_state_for_toggle
-                    
-                    self._send_hyperion_command({
-                        "command": "componentstate",
-                        "componentstate": {"component": HYPERION_COMPONENT_LEDDEVICE, "state": target_leddevice_state}
-                    })
-
-                # Brightness ("bri") - WLED 0-255 -> Hyperion brightness 0-100
-                if "bri" in state_params:
-                    wled_brightness_param = int(state_params["bri"])
-                    hyperion_brightness_target = max(0, min(100, round((wled_brightness_param / 255.0) * 100)))
-                    self._send_hyperion_command({
-                        "command": "adjustment",
-                        "adjustment": {"brightness": hyperion_brightness_target} # Value is an object
-                    })
-                
-                # Segments ("seg") - For color or effect (applies globally in Hyperion via this API)
-                if "seg" in state_params and isinstance(state_params["seg"], list) and state_params["seg"]:
-                    # Assume WLED's first segment definition applies globally to Hyperion
-                    segment_data = state_params["seg"][0] 
-
-                    # Effect ("fx")
-                    if "fx" in segment_data:
-                        wled_effect_idx = segment_data["fx"]
-                        hyperion_effect_name = WLED_TO_HYPERION_EFFECT_MAP.get(wled_effect_idx)
-                        if hyperion_effect_name:
-                            hyperion_effect_args = {}
-                            # WLED speed (sx) and intensity (ix) are 0-255.
-                            # Hyperion effect args are effect-specific. Common ones might be "speed", "intensity".
-                            # This mapping is very approximate and may need per-effect tuning.
-                            if "sx" in segment_data: # WLED Speed
-                                # Example scaling: WLED 0-255 -> Hyperion 0.1-2.0 (adjust as needed)
-                                hyperion_effect_args["speed"] = max(0.1, segment_data["sx"] / 128.0) 
-                            if "ix" in segment_data: # WLED Intensity
-                                # Example scaling: WLED 0-255 -> Hyperion 0.1-2.0 (adjust as needed)
-                                hyperion_effect_args["intensity"] = max(0.1, segment_data["ix"] / 128.0)
-                            
-                            # Colors ("col") for the effect
-                            # WLED: "col": [[r,g,b,w?], [r2,g2,b2,w2?], ...]
-                            # Hyperion effects might take a "colors" arg as [[r,g,b],[r,g,b]] or "color" as [r,g,b]
-                            if "col" in segment_data and segment_data["col"]:
-                                effect_colors_rgb_only = [c[:3] for c in segment_data["col"]] # Take RGB, ignore W
-                                if effect_colors_rgb_only:
-                                     # Hyperion effects define their own arg names. "colors" and "color" are common.
-                                    if len(effect_colors_rgb_only) == 1:
-                                        hyperion_effect_args["color"] = effect_colors_rgb_only[0]
-                                    hyperion_effect_args["colors"] = effect_colors_rgb_only # Pass array of colors
-                            
-                            # Palette ("pal") - WLED palette index
-                            # Hyperion effects typically don't take a generic palette index this way.
-                            # This will likely be ignored unless a specific Hyperion effect uses an arg named "palette".
-                            if "pal" in segment_data:
-                                hyperion_effect_args["palette"] = segment_data["pal"] # Highly speculative
-
-                            self._send_hyperion_command({
-                                "command": "effect",
-                                "effect": {"name": hyperion_effect_name, "args": hyperion_effect_args},
-                                "priority": self.priority,
-                                "origin": self.origin # Name of the controlling application
-                            })
-                        else:
-                            logger.warning(f"No Hyperion effect mapping for WLED effect index: {wled_effect_idx}")
-                    
-                    # Solid Color (if no "fx" in segment, but "col" is present)
-                    elif "col" in segment_data and segment_data["col"]:
-                        # Use the first color defined in WLED segment, RGB components only
-                        rgb_color_to_set = segment_data["col"][0][:3] 
-                        self._send_hyperion_command({
-                            "command": "color",
-                            "color": rgb_color_to_set,
-                            "priority": self.priority,
-                            "origin": self.origin
-                        })
-                
-                # Preset ("ps")
-                if "ps" in state_params:
-                    wled_preset_id = state_params["ps"]
-                    hyperion_preset_action = WLED_TO_HYPERION_PRESET_MAP.get(wled_preset_id)
-                    if hyperion_preset_action:
-                        # Construct command based on preset_action type
-                        cmd_details_for_preset = {
-                            "priority": self.priority,
-                            "origin": f"{self.origin}_P{wled_preset_id}"[:20] # Ensure origin length compliance
-                        }
-                        if hyperion_preset_action["type"] == "effect":
-                            cmd_details_for_preset["command"] = "effect"
-                            cmd_details_for_preset["effect"] = {
-                                "name": hyperion_preset_action["name"],
-                                "args": hyperion_preset_action.get("args", {})
-                            }
-                        elif hyperion_preset_action["type"] == "color":
-                            cmd_details_for_preset["command"] = "color"
-                            cmd_details_for_preset["color"] = hyperion_preset_action["rgb"]
-                        
-                        self._send_hyperion_command(cmd_details_for_preset)
-                    else:
-                        logger.warning(f"No Hyperion preset mapping for WLED preset ID: {wled_preset_id}")
-                
-                # WLED transition - Hyperion has global smoothing, not per-command transitions easily via this API.
-                if "transition" in state_params:
-                    logger.debug("Hyperion adapter: WLED 'transition' parameter is ignored for commands.")
+            # Get current Hyperion LEDDEVICE state before sending new commands (cached briefly)
+            led_on_before = self._get_led_on_state()
+            if led_on_before is None and _is_toggle(state_params):
+                led_on_before = self._get_led_on_state(max_age=0) # Initial fetch failed; toggling needs it
+
+            pending = self._build_hyperion_commands(state_params, led_on_before)
+            responses = self._send_hyperion_batch(pending)
+            self._failures = self._trips = 0 # Hyperion answered
+            self._remember_led_state(pending, responses)
+            status = self._status_after_writes(state_params, pending, responses)
+            if status is not None:
+                return status
 
             # --- Fetch final state from Hyperion to construct WLED-like response ---
             final_hyperion_info = self._get_hyperion_serverinfo()
             if final_hyperion_info is None:
                 # If we can't get serverinfo after commands, assume a connection issue persisted or occurred.
                 raise ConnectionError("Failed to get Hyperion serverinfo after command execution.")
+            return self._status_from_serverinfo(final_hyperion_info)
+
+        except Exception as e:
+            return self._failure_status(e)
+
+    def _build_hyperion_commands(self, state_params: Optional[Dict], led_on_before: Optional[bool]) -> List[Dict]:
+        """
+        Translates WLED-style state_params into the list of Hyperion commands to send,
+        given the LEDDEVICE state beforehand (None if unknown).
+        """
+        is_power_control_command = state_params is not None and "on" in state_params
+        is_visual_effect_command = state_params and any(k in state_params for k in ["bri", "seg", "ps", "pixels"])
+
+        # --- Process state_params (WLED style) into Hyperion commands ---
+        # Commands are collected here and written to Hyperion in one batch by the caller
+        pending: List[Dict] = []
+
+        # If LEDDEVICE is off, and we are trying to set a visual (not just power), turn it on.
+        # It leads the batch; Hyperion handles commands on a connection in order, so no wait is needed.
+        if not led_on_before and state_params and \
+           is_visual_effect_command and not is_power_control_command:
+            logger.debug("Hyperion LEDDEVICE is off, turning it on first.")
+            pending.append({
+                "command": "componentstate",
+                "componentstate": {"component": HYPERION_COMPONENT_LEDDEVICE, "state": True}
+            })
+        if state_params:
+            # Power ("on")
+            if "on" in state_params:
+                power_val = state_params["on"]
+                target_leddevice_state = bool(power_val)
+                if isinstance(power_val, str) and power_val.lower() == "t": # Toggle
+                    target_leddevice_state = not led_on_before
+                
+                pending.append({
+                    "command": "componentstate",
+                    "componentstate": {"component": HYPERION_COMPONENT_LEDDEVICE, "state": target_leddevice_state}
+                })
 
-            # Determine final 'is_on' state from LEDDEVICE component
-            is_on_final = False
-            for comp in final_hyperion_info.get("components", []):
-                if comp.get("name") == HYPERION_COMPONENT_LEDDEVICE:
-                    is_on_final = comp.get("enabled", False)
-                    break
+            # Brightness ("bri") - WLED 0-255 -> Hyperion brightness 0-100
+            if "bri" in state_params:
+                wled_brightness_param = int(state_params["bri"])
+                # Clamping first is equivalent to clamping the scaled value
+                hyperion_brightness_target = _BRI_WLED_TO_HYP[max(0, min(255, wled_brightness_param))]
+                pending.append({
+                    "command": "adjustment",
+                    "adjustment": {"brightness": hyperion_brightness_target} # Value is an object
+                })
+            
+            # Segments ("seg") - For color or effect (applies globally in Hyperion via this API)
+            if "seg" in state_params and isinstance(state_params["seg"], list) and state_params["seg"]:
+                # Assume WLED's first segment definition applies globally to Hyperion
+                segment_data = state_params["seg"][0] 
+
+                # Effect ("fx")
+                if "fx" in segment_data:
+                    wled_effect_idx = segment_data["fx"]
+                    hyperion_effect_name = _lut_get(_EFFECT_LUT, WLED_TO_HYPERION_EFFECT_MAP, wled_effect_idx)
+                    if hyperion_effect_name:
+                        hyperion_effect_args = {}
+                        # WLED speed (sx) and intensity (ix) are 0-255.
+                        # Hyperion effect args are effect-specific. Common ones might be "speed", "intensity".
+                        # This mapping is very approximate and may need per-effect tuning.
+                        if "sx" in segment_data: # WLED Speed
+                            hyperion_effect_args["speed"] = _scale_effect_arg(segment_data["sx"])
+                        if "ix" in segment_data: # WLED Intensity
+                            hyperion_effect_args["intensity"] = _scale_effect_arg(segment_data["ix"])
+                        
+                        # Colors ("col") for the effect
+                        # WLED: "col": [[r,g,b,w?], [r2,g2,b2,w2?], ...]
+                        # Hyperion effects might take a "colors" arg as [[r,g,b],[r,g,b]] or "color" as [r,g,b]
+                        if "col" in segment_data and segment_data["col"]:
+                            effect_colors_rgb_only = [(c[0], c[1], c[2]) for c in segment_data["col"]] # Take RGB, ignore W
+                            if effect_colors_rgb_only:
+                                 # Hyperion effects define their own arg names. "colors" and "color" are common.
+                                if len(effect_colors_rgb_only) == 1:
+                                    hyperion_effect_args["color"] = effect_colors_rgb_only[0]
+                                hyperion_effect_args["colors"] = effect_colors_rgb_only # Pass array of colors
+                        
+                        # Palette ("pal") - WLED palette index
+                        # Hyperion effects typically don't take a generic palette index this way.
+                        # This will likely be ignored unless a specific Hyperion effect uses an arg named "palette".
+                        if "pal" in segment_data:
+                            hyperion_effect_args["palette"] = segment_data["pal"] # Highly speculative
+
+                        effect_cmd = {
+                            "command": "effect",
+                            "effect": {"name": hyperion_effect_name, "args": hyperion_effect_args},
+                            "priority": self.priority,
+                            "origin": self.origin # Name of the controlling application
+                        }
+                        if "duration" in segment_data: # Hyperion clears the priority when it expires
+                            effect_cmd["duration"] = segment_data["duration"]
+                        pending.append(effect_cmd)
+                    else:
+                        logger.warning("No Hyperion effect mapping for WLED effect index: %s", wled_effect_idx)
+                
+                # Solid Color (if no "fx" in segment, but "col" is present)
+                elif "col" in segment_data and segment_data["col"]:
+                    # Use the first color defined in WLED segment, RGB components only
+                    first_color = segment_data["col"][0]
+                    rgb_color_to_set = (first_color[0], first_color[1], first_color[2])
+                    color_cmd = {
+                        "command": "color",
+                        "color": rgb_color_to_set,
+                        "priority": self.priority,
+                        "origin": self.origin
+                    }
+                    if "duration" in segment_data:
+                        color_cmd["duration"] = segment_data["duration"]
+                    pending.append(color_cmd)
             
-            # Determine final brightness (Hyperion 0-100, scale to WLED 0-255)
-            hyperion_brightness_final_val = 100 # Default if not found
-            adjustments_list = final_hyperion_info.get("adjustment", []) # serverinfo.adjustment is a list
-            if adjustments_list and isinstance(adjustments_list, list) and adjustments_list:
-                 # Find the brightness adjustment. Usually in the first/default adjustment object.
-                for adj_item in adjustments_list:
-                    if "brightness" in adj_item:
-                        hyperion_brightness_final_val = adj_item.get("brightness", 100)
-                        break # Found brightness, use it
-
-            wled_brightness_final = round((hyperion_brightness_final_val / 100.0) * 255)
-
-            # Determine active WLED-mapped preset ID (complex part)
-            active_wled_preset_id = -1
-            hyperion_priorities = final_hyperion_info.get("priorities", [])
-            # Find the source that is currently visible on the LEDs
-            visible_priority_source = next((p for p in hyperion_priorities if p.get("visible")), None)
-
-            if visible_priority_source:
-                component_id = visible_priority_source.get("componentId")
-                owner_name = visible_priority_source.get("owner") # For EFFECT, this is the effect name
-                active_color_rgb = visible_priority_source.get("value", {}).get("RGB") # For COLOR
-
-                for wled_pid, preset_action_def in WLED_TO_HYPERION_PRESET_MAP.items():
-                    if preset_action_def["type"] == "effect" and component_id == "EFFECT" and \
-                       preset_action_def["name"] == owner_name:
-                        # Simplistic match by name; args could also be compared for more accuracy
-                        active_wled_preset_id = wled_pid
-                        break
-                    elif preset_action_def["type"] == "color" and component_id == "COLOR" and \
-                         active_color_rgb and \
-                         all(a == b for a,b in zip(preset_action_def["rgb"], active_color_rgb)): # Compare RGB lists
-                        active_wled_preset_id = wled_pid
-                        break
+            # Preset ("ps")
+            if "ps" in state_params:
+                wled_preset_id = state_params["ps"]
+                hyperion_preset_action = _lut_get(_PRESET_LUT, WLED_TO_HYPERION_PRESET_MAP, wled_preset_id)
+                if hyperion_preset_action:
+                    # Construct command based on preset_action type
+                    cmd_details_for_preset = {
+                        "priority": self.priority,
+                        "origin": f"{self.origin}_P{wled_preset_id}"[:20] # Ensure origin length compliance
+                    }
+                    if hyperion_preset_action["type"] == "effect":
+                        cmd_details_for_preset["command"] = "effect"
+                        cmd_details_for_preset["effect"] = {
+                            "name": hyperion_preset_action["name"],
+                            "args": hyperion_preset_action.get("args", {})
+                        }
+                    elif hyperion_preset_action["type"] == "color":
+                        cmd_details_for_preset["command"] = "color"
+                        cmd_details_for_preset["color"] = hyperion_preset_action["rgb"]
+                    
+                    pending.append(cmd_details_for_preset)
+                else:
+                    logger.warning("No Hyperion preset mapping for WLED preset ID: %s", wled_preset_id)
             
-            return {
-                "connected": True,
-                "is_on": is_on_final,
-                "preset_id": active_wled_preset_id,
-                "playlist_id": -1, # Hyperion doesn't have a direct WLED-style playlist concept via this API
-                "brightness": wled_brightness_final,
-                "message": "Hyperion is ON" if is_on_final else "Hyperion is OFF"
-            }
-
-        except ValueError as e: # e.g. IP not configured
+            # Pixels ("pixels") - adapter-specific: one color per LED, as a flat [r, g, b, r, g, b, ...] list
+            if "pixels" in state_params:
+                # A duration, if any, is part of the "pixels" payload
+                pending.append({"command": "color", **state_params["pixels"],
+                                "priority": self.priority, "origin": self.origin})
+
+            # WLED transition - Hyperion has global smoothing, not per-command transitions easily via this API.
+            if "transition" in state_params:
+                logger.debug("Hyperion adapter: WLED 'transition' parameter is ignored for commands.")
+
+        return pending
+
+    def _status_after_writes(self, state_params: Optional[Dict], commands: List[Dict],
+                             responses: List[Dict]) -> Optional[Dict]:
+        """
+        Builds the WLED-like status from the commands just written, on top of the last known
+        state, so no serverinfo round-trip is needed. Returns None when Hyperion has to be asked
+        instead: status checks, toggles (the resolved state is reported), failed commands,
+        or when the rest of the state isn't known yet.
+        """
+        if not state_params or _is_toggle(state_params):
+            return None
+        if not all(r.get("success", False) for r in responses):
+            return None
+
+        known = dict(self._last_known)
+        for command_obj in commands:
+            if command_obj["command"] == "adjustment":
+                hyperion_brightness = command_obj["adjustment"]["brightness"]
+                known["bri_wled"] = round((hyperion_brightness / 100.0) * 255) # As serverinfo would report it
+            elif command_obj["command"] == "effect":
+                known["preset_id"] = _PRESET_REVERSE_EFFECT.get(command_obj["effect"]["name"], -1)
+            elif command_obj["command"] == "color":
+                color = command_obj["color"]
+                # Per-LED colors (set_pixels()) are never a preset
+                known["preset_id"] = _PRESET_REVERSE_COLOR.get(tuple(color), -1) if len(color) == 3 else -1
+        if self._led_on_cache is None or "bri_wled" not in known or "preset_id" not in known:
+            return None
+        known["on"] = self._led_on_cache[1]
+
+        self._last_known = known
+        return self._wled_status(known["on"], known["preset_id"], known["bri_wled"])
+
+    @staticmethod
+    def _wled_status(is_on: bool, preset_id: int, wled_brightness: int) -> Dict:
+        """The WLED-like status dictionary returned by the public methods."""
+        return {
+            "connected": True,
+            "is_on": is_on,
+            "preset_id": preset_id,
+            "playlist_id": -1, # Hyperion doesn't have a direct WLED-style playlist concept via this API
+            "brightness": wled_brightness,
+            "message": "Hyperion is ON" if is_on else "Hyperion is OFF"
+        }
+
+    def _status_from_serverinfo(self, server_info: Dict) -> Dict:
+        """Builds the WLED-like status dictionary from a Hyperion serverinfo 'info' object."""
+        known = self._remember_serverinfo(server_info)
+        return self._wled_status(known["on"], known["preset_id"], known["bri_wled"])
+
+    def _remember_serverinfo(self, server_info: Dict) -> Dict[str, Any]:
+        """
+        Reads the LEDDEVICE state, brightness and WLED-mapped preset from a serverinfo 'info' object
+        into _led_on_cache and _last_known, and returns the latter.
+        """
+        idx = _index_serverinfo(server_info)
+
+        # Determine final 'is_on' state from LEDDEVICE component
+        is_on_final = idx.components_by_name.get(HYPERION_COMPONENT_LEDDEVICE, {}).get("enabled", False)
+        self._led_on_cache = (time.monotonic(), is_on_final)  # Fresh from Hyperion
+        
+        # Determine final brightness (Hyperion 0-100, scale to WLED 0-255)
+        wled_brightness_final = round((idx.brightness / 100.0) * 255)
+
+        # Determine active WLED-mapped preset ID (complex part)
+        active_wled_preset_id = -1
+        visible_priority_source = idx.visible_priority
+
+        if visible_priority_source:
+            component_id = visible_priority_source.get("componentId")
+            owner_name = visible_priority_source.get("owner") # For EFFECT, this is the effect name
+            active_color_rgb = visible_priority_source.get("value", {}).get("RGB") # For COLOR
+
+            if component_id == "EFFECT":
+                # Simplistic match by name; args could also be compared for more accuracy
+                active_wled_preset_id = _PRESET_REVERSE_EFFECT.get(owner_name, -1)
+            elif component_id == "COLOR" and active_color_rgb:
+                active_wled_preset_id = _PRESET_REVERSE_COLOR.get(tuple(active_color_rgb), -1)
+
+        self._last_known = {"on": is_on_final, "bri_wled": wled_brightness_final, "preset_id": active_wled_preset_id}
+        return self._last_known
+
+    def _fresh_status(self) -> Optional[Dict]:
+        """A copy of the cached check_wled_status() result if younger than status_ttl, else None."""
+        cached = self._status_cache
+        if cached is not None and time.monotonic() - cached[0] < self.status_ttl:
+            return dict(cached[1])
+        return None
+
+    def _cache_status(self, status: Dict) -> Dict:
+        """Caches a freshly fetched status for check_wled_status() and returns a copy of it."""
+        self._status_cache = (time.monotonic(), status)
+        return dict(status)
+
+    @staticmethod
+    def _error_status(e: Exception) -> Dict:
+        """
+        Maps an exception raised while talking to Hyperion to a WLED-like status dictionary.
+        Must be called from the except block handling it.
+        """
+        if isinstance(e, ValueError): # e.g. IP not configured
             return {"connected": False, "message": str(e)}
-        # Catch more specific connection errors first
-        except (ConnectionRefusedError, ConnectionError, socket.gaierror, socket.timeout) as e: # gaierror for DNS issues
-             return {"connected": False, "message": f"Cannot connect to Hyperion: {str(e)}"}
-        except json.JSONDecodeError as e: # From _send_hyperion_command if parsing fails
+        # Check more specific connection errors first
+        if isinstance(e, (ConnectionRefusedError, ConnectionError, socket.gaierror, socket.timeout)): # gaierror for DNS issues
+            return {"connected": False, "message": f"Cannot connect to Hyperion: {str(e)}"}
+        if isinstance(e, json.JSONDecodeError): # From _send_hyperion_command if parsing fails
             return {"connected": False, "message": f"Error parsing Hyperion response: {str(e)}"}
-        except Exception as e: # Catch-all for other unexpected issues during the process
-            logger.exception("Unexpected error in _send_command for Hyperion adapter")
-            return {"connected": False, "message": f"Unexpected Hyperion adapter error: {str(e)}"}
-
-    # --- Public methods mimicking WLEDController interface ---
-    def check_wled_status(self) -> Dict:
-        """Check Hyperion connection status and its current state (brightness, power)."""
-        return self._send_command() # No params, just gets status translated to WLED format
+        # Catch-all for other unexpected issues during the process
+        logger.exception("Unexpected error in _send_command for Hyperion adapter")
+        return {"connected": False, "message": f"Unexpected Hyperion adapter error: {str(e)}"}
 
-    def set_brightness(self, value: int) -> Dict:
-        """Set Hyperion global brightness (WLED scale 0-255)."""
+    # --- Translation of public method arguments into WLED-style state_params ---
+    # Each raises ValueError with a user-facing message when the arguments are invalid.
+    def _brightness_state_params(self, value: int) -> Dict:
         if not 0 <= value <= 255:
-            return {"connected": False, "message": "Brightness must be between 0 and 255"}
-        return self._send_command({"bri": value})
+            raise ValueError("Brightness must be between 0 and 255")
+        return {"bri": value}
 
-    def set_power(self, state: int) -> Dict:
-        """Set Hyperion LEDDEVICE power state (0=Off, 1=On, 2=Toggle)."""
+    def _power_state_params(self, state: int) -> Dict:
         if state not in [0, 1, 2]:
-            return {"connected": False, "message": "Power state must be 0 (Off), 1 (On), or 2 (Toggle)"}
+            raise ValueError("Power state must be 0 (Off), 1 (On), or 2 (Toggle)")
         if state == 2: # Toggle
-            return self._send_command({"on": "t"})
-        return self._send_command({"on": bool(state)}) # 0 is False, 1 is True
+            return {"on": "t"}
+        return {"on": bool(state)} # 0 is False, 1 is True
 
     def _hex_to_rgb(self, hex_color: str) -> Tuple[int, int, int]:
         """Convert hex color string (e.g., '#FF0000') to RGB tuple."""
-        hex_color = hex_color.lstrip('#')
-        if len(hex_color) != 6:
-            raise ValueError("Hex color must be 6 characters long (without #)")
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-    def set_color(self, r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None) -> Dict:
-        """Set Hyperion to a solid color using RGB values or hex code."""
-        rgb_to_set: List[int] = [0,0,0] # Default to black if no color specified
+        return _hex_to_rgb(hex_color)
+
+    def _color_state_params(self, r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                            duration: int = None) -> Dict:
+        rgb_to_set: Tuple[int, int, int] = (0, 0, 0) # Default to black if no color specified
         if hex is not None:
-            try:
-                r_hex, g_hex, b_hex = self._hex_to_rgb(hex)
-                rgb_to_set = [r_hex, g_hex, b_hex]
-            except ValueError as e:
-                return {"connected": False, "message": str(e)}
-        elif any(val is not None for val in [r, g, b]): # Only set if r,g or b is provided
-            rgb_to_set = [r or 0, g or 0, b or 0]
+            rgb_to_set = self._hex_to_rgb(hex)
+        elif r is not None or g is not None or b is not None: # Only set if r,g or b is provided
+            rgb_to_set = (r or 0, g or 0, b or 0)
 
         # Hyperion's basic color command is RGB. 'w' (white channel) from WLED is ignored here.
         if w is not None:
             logger.warning("Hyperion adapter: 'w' (white channel) in set_color is currently ignored for basic color command.")
         
         # Translate to WLED-style state_params for _send_command
-        return self._send_command({"seg": [{"col": [rgb_to_set]}]})
+        segment: Dict[str, Any] = {"col": [rgb_to_set]}
+        if duration is not None: # Kept with the segment, so merged updates don't inherit it
+            segment["duration"] = _check_duration(duration)
+        return {"seg": [segment]}
 
-    def set_effect(self, effect_index: int, speed: int = None, intensity: int = None, 
-                   brightness: int = None, palette: int = None,
-                   # Primary color
-                   r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
-                   # Secondary color
-                   r2: int = None, g2: int = None, b2: int = None, w2: int = None, hex2: str = None,
-                   # Transition (WLED specific, ignored by Hyperion in this context)
-                   transition: int = 0) -> Dict:
-        """Set Hyperion effect (mapped from WLED effect_index) with optional parameters."""
+    def _effect_state_params(self, *args, **kwargs) -> Dict:
+        """
+        Validates set_effect() arguments into WLED-style state_params, memoized: helpers and UIs
+        send the same few combinations over and over. Unhashable arguments skip the cache.
+        """
+        try:
+            return self._build_effect_state_params(*args, **kwargs)
+        except TypeError: # Unhashable argument; any other TypeError is raised again below
+            return self._build_effect_state_params.__wrapped__(*args, **kwargs)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _build_effect_state_params(effect_index: int, speed: int = None, intensity: int = None,
+                                   brightness: int = None, palette: int = None,
+                                   r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                                   r2: int = None, g2: int = None, b2: int = None, w2: int = None, hex2: str = None,
+                                   transition: int = 0, duration: int = None) -> Dict:
+        """
+        Builds the state_params for _effect_state_params(). Raises ValueError if invalid.
+        The result is shared by every caller with the same arguments, so it must not be modified.
+        """
         try:
             wled_effect_idx_int = int(effect_index)
         except (ValueError, TypeError):
-            return {"connected": False, "message": "Effect index must be a valid integer"}
+            raise ValueError("Effect index must be a valid integer")
+
+        for (label, lo, hi), value in zip(_EFFECT_RANGE_CHECKS, (speed, intensity, brightness, palette, w, w2)):
+            if value is not None and not lo <= value <= hi:
+                raise ValueError(f"{label} must be between {lo} and {hi}")
 
         # WLED effect indices (e.g. 0-101). Hyperion effect names are from WLED_TO_HYPERION_EFFECT_MAP.
         # Validation for WLED's 0-101 range is implicitly handled by the map lookup.
         
         # Construct the 'seg' part of WLED-style state_params
         seg_payload_for_wled_style: Dict[str, Any] = {"fx": wled_effect_idx_int}
-        colors_for_effect_param = [] # List of color arrays [[R,G,B], [R2,G2,B2]]
+        colors_for_effect_param = [] # List of color triples [(R,G,B), (R2,G2,B2)]
 
         # Primary color processing
-        primary_color_components_rgb: Optional[List[int]] = None
+        primary_color_components_rgb: Optional[Tuple[int, int, int]] = None
         if hex is not None:
             try:
-                r_p, g_p, b_p = self._hex_to_rgb(hex)
-                primary_color_components_rgb = [r_p, g_p, b_p]
+                primary_color_components_rgb = _hex_to_rgb(hex)
             except ValueError as e:
-                return {"connected": False, "message": f"Primary color hex error: {str(e)}"}
-        elif any(val is not None for val in [r, g, b]): # If RGB values are given
-            primary_color_components_rgb = [r or 0, g or 0, b or 0]
+                raise ValueError(f"Primary color hex error: {str(e)}")
+        elif r is not None or g is not None or b is not None: # If RGB values are given
+            primary_color_components_rgb = (r or 0, g or 0, b or 0)
         
         if primary_color_components_rgb: # Only add if color was actually specified
             # WLED effects can use 'w', Hyperion effects typically don't use it directly in 'color'/'colors' arg
             if w is not None: 
-                if not 0 <= w <= 255: return {"connected": False, "message": "Primary white value must be between 0 and 255"}
-                # primary_color_components_rgb.append(w) # WLED would include W; Hyperion usually expects RGB
+                # WLED would include W; Hyperion usually expects RGB
                 logger.debug("Primary 'w' channel for effect color ignored for Hyperion effect color arguments.")
             colors_for_effect_param.append(primary_color_components_rgb)
 
         # Secondary color processing
-        secondary_color_components_rgb: Optional[List[int]] = None
+        secondary_color_components_rgb: Optional[Tuple[int, int, int]] = None
         if hex2 is not None:
             try:
-                r_s, g_s, b_s = self._hex_to_rgb(hex2)
-                secondary_color_components_rgb = [r_s, g_s, b_s]
+                secondary_color_components_rgb = _hex_to_rgb(hex2)
             except ValueError as e:
-                return {"connected": False, "message": f"Secondary color hex error: {str(e)}"}
-        elif any(val is not None for val in [r2, g2, b2]): # If RGB values are given
-            secondary_color_components_rgb = [r2 or 0, g2 or 0, b2 or 0]
+                raise ValueError(f"Secondary color hex error: {str(e)}")
+        elif r2 is not None or g2 is not None or b2 is not None: # If RGB values are given
+            secondary_color_components_rgb = (r2 or 0, g2 or 0, b2 or 0)
 
         if secondary_color_components_rgb: # Only add if color was actually specified
             if w2 is not None:
-                if not 0 <= w2 <= 255: return {"connected": False, "message": "Secondary white value must be between 0 and 255"}
                 logger.debug("Secondary 'w' channel for effect color ignored for Hyperion effect color arguments.")
             colors_for_effect_param.append(secondary_color_components_rgb)
         
@@ -505,44 +1133,627 @@ class LEDController:
         
         # Add other WLED-style effect parameters for translation by _send_command
         if speed is not None:
-            if not 0 <= speed <= 255: return {"connected": False, "message": "Speed must be between 0 and 255"}
             seg_payload_for_wled_style["sx"] = speed
         
         if intensity is not None:
-            if not 0 <= intensity <= 255: return {"connected": False, "message": "Intensity must be between 0 and 255"}
             seg_payload_for_wled_style["ix"] = intensity
         
         if palette is not None: # WLED palette index
-            if not 0 <= palette <= 46: # Original WLED validation for its palettes
-                 return {"connected": False, "message": "Palette index must be between 0 and 46"}
             seg_payload_for_wled_style["pal"] = palette
 
+        if duration is not None: # Hyperion-only: the effect is cleared after this many ms
+            seg_payload_for_wled_style["duration"] = _check_duration(duration)
+
         # Combine into final WLED-style state_params dictionary
         final_state_params_for_wled_style: Dict[str, Any] = {"seg": [seg_payload_for_wled_style]}
         
         if brightness is not None: # This is overall brightness for Hyperion
-            if not 0 <= brightness <= 255: return {"connected": False, "message": "Brightness must be between 0 and 255"}
             final_state_params_for_wled_style["bri"] = brightness
         
         # WLED transition parameter. _send_command will note that it's ignored for Hyperion.
         if transition != 0: # Default is 0 for WLED (instant change)
              final_state_params_for_wled_style["transition"] = transition
 
-        return self._send_command(final_state_params_for_wled_style)
+        return final_state_params_for_wled_style
 
-    def set_preset(self, preset_id: int) -> Dict:
-        """Set a Hyperion state corresponding to a WLED preset ID (via mapping)."""
+    def _preset_state_params(self, preset_id: int) -> Dict:
         try:
             pid = int(preset_id)
         except ValueError:
-             return {"connected": False, "message": "Preset ID must be an integer"}
-        
-        response = self._send_command({"ps": pid})
-        # logger.debug(f"Set Hyperion preset (mapped from WLED ID {pid}): {response}") # Logging happens in _send_command
+            raise ValueError("Preset ID must be an integer")
+        return {"ps": pid}
+
+    def _pixels_state_params(self, pixels: Any, brightness: int = None, duration: int = None) -> Dict:
+        """
+        Packs per-LED colors into WLED-style state_params for a Hyperion color command, which takes
+        them as one flat [r, g, b, r, g, b, ...] list. pixels is a sequence of (r, g, b), flat RGB
+        bytes, or a uint8 numpy array shaped (N, 3).
+        """
+        if brightness is not None and not 0 <= brightness <= 255:
+            raise ValueError("Brightness must be between 0 and 255")
+
+        np = sys.modules.get("numpy")  # Only ever needed for arrays, so numpy is already imported then
+        if np is not None and isinstance(pixels, np.ndarray):
+            if pixels.dtype != np.uint8 or pixels.ndim != 2 or pixels.shape[1] != 3:
+                raise ValueError("Pixel arrays must be uint8, shaped (N, 3)")
+            if brightness is not None:
+                pixels = (pixels.astype(np.uint16) * brightness // 255).astype(np.uint8)
+            rgb_data = pixels.tobytes()
+        else:
+            try:
+                if isinstance(pixels, (bytes, bytearray, memoryview)):
+                    rgb_data = bytes(pixels)
+                else:
+                    pixels = list(pixels)  # May be a one-shot iterator
+                    if any(len(pixel) != 3 for pixel in pixels): # Else the colors would shift along the LEDs
+                        raise ValueError
+                    rgb_data = bytes(itertools.chain.from_iterable(pixels))
+            except (TypeError, ValueError):
+                raise ValueError("Pixels must be (r, g, b) values between 0 and 255")
+            if brightness is not None:
+                rgb_data = rgb_data.translate(_brightness_table(brightness))
+
+        if not rgb_data or len(rgb_data) % 3:
+            raise ValueError("Pixels must be a non-empty sequence of (r, g, b) values")
+
+        pixels_payload: Dict[str, Any] = {"color": list(rgb_data)}
+        if duration is not None:
+            pixels_payload["duration"] = _check_duration(duration)
+        return {"pixels": pixels_payload}
+
+    def _run(self, build_state_params, *args, flush: bool = True, **kwargs) -> Dict:
+        """
+        Builds state_params with the given builder and sends them, reporting invalid arguments.
+        With flush=False the update is queued instead (see _enqueue).
+        """
+        try:
+            state_params = build_state_params(*args, **kwargs)
+        except ValueError as e:
+            return {"connected": False, "message": str(e)}
+        return self._apply(state_params, flush)
+
+    def _apply(self, state_params: Dict, flush: bool = True) -> Dict:
+        """Sends already validated state_params together with any queued ones, or queues them."""
+        if not flush or self._corked:
+            return self._queue(state_params)
+        queued = self._take_pending()
+        if queued: # Send queued updates along with this one, which wins where they overlap
+            queued.update(state_params)
+            state_params = queued
+        return self._send_command(state_params)
+
+    def _queue(self, state_params: Dict) -> Dict:
+        """
+        Queues state_params (see _enqueue) and reports them as queued, unless they could not be
+        sent anyway (no IP configured, or the circuit breaker is open); then that status is returned.
+        """
+        if not self.ip_address:
+            return {"connected": False, "message": "No Hyperion IP configured"}
+        broken = self._breaker_status()
+        if broken is not None:
+            return broken
+        self._enqueue(state_params)
+        return {"connected": True, "queued": True, "message": "Hyperion update queued"}
+
+    def _enqueue(self, state_params: Dict) -> None:
+        """
+        Queues state_params, overwriting queued values for the same keys, and (re)starts
+        the debounce timer. A burst of updates (e.g. from a slider) is sent as one
+        command batch carrying the latest values once no update arrived for DEBOUNCE_DELAY.
+        """
+        with self._pending_lock:
+            self._pending.update(state_params)
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._corked:
+                return # Sent when the outermost cork() block exits
+            self._flush_timer = threading.Timer(self.DEBOUNCE_DELAY, self._flush_queued)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _take_pending(self) -> Dict:
+        """Removes and returns the queued state_params, cancelling the debounce timer."""
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _flush_queued(self) -> None:
+        """Debounce timer callback."""
+        status = self.flush()
+        if status is not None and not status.get("connected"):
+            logger.warning("Queued Hyperion update failed: %s", status.get('message'))
+
+    def flush(self) -> Optional[Dict]:
+        """Send queued (flush=False) updates now. Returns the status, or None if nothing was queued."""
+        state_params = self._take_pending()
+        if not state_params:
+            return None
+        return self._send_command(state_params)
+
+    @contextlib.contextmanager
+    def cork(self):
+        """
+        Holds back the updates made inside the block and sends them as one command batch
+        when it exits (later updates win where they overlap, as with flush=False):
+
+            with controller.cork():
+                controller.set_color(hex="#FF0000")
+                controller.set_brightness(128)
+        """
+        with self._pending_lock:
+            self._corked += 1
+        try:
+            yield self
+        finally:
+            with self._pending_lock:
+                self._corked -= 1
+                corked = self._corked
+            if not corked:
+                self._flush_queued()
+
+    def send_batch(self, commands: List[Dict]) -> List[Dict]:
+        """
+        Sends raw Hyperion JSON commands in a single write and returns their responses in
+        the same order. Each command gets the auth token and a fresh tan. Raises ValueError
+        without an IP and ConnectionError on connection problems, or while the circuit breaker is open.
+        """
+        message = self._breaker_message()
+        if message is not None:
+            raise ConnectionError(message)
+        self._status_cache = None
+        try:
+            responses = self._send_hyperion_batch(commands)
+        except (OSError, json.JSONDecodeError):
+            self._record_failure()
+            raise
+        self._failures = self._trips = 0
+        self._last_known = {} # The commands may have changed anything; ask Hyperion next time
+        self._remember_led_state(commands, responses)
+        return responses
+
+    # --- Public methods mimicking WLEDController interface ---
+    def check_wled_status(self) -> Dict:
+        """
+        Check Hyperion connection status and its current state (brightness, power).
+        A status fetched less than status_ttl seconds ago is returned without asking again.
+        """
+        cached = self._fresh_status()
+        if cached is not None:
+            return cached
+        broken = self._breaker_status()
+        if broken is not None:
+            return broken
+        # A single serverinfo round-trip, translated to WLED format
+        try:
+            if not self.ip_address:
+                raise ValueError("No Hyperion IP configured")
+            server_info = self._get_hyperion_serverinfo()
+            if server_info is None:
+                raise ConnectionError("Failed to get Hyperion serverinfo after command execution.")
+            self._failures = self._trips = 0
+            return self._cache_status(self._status_from_serverinfo(server_info))
+        except Exception as e:
+            return self._failure_status(e)
+
+    def set_brightness(self, value: int, flush: bool = True) -> Dict:
+        """
+        Set Hyperion global brightness (WLED scale 0-255).
+        Pass flush=False for rapid updates (e.g. a slider) to have them debounced.
+        """
+        if type(value) is int and 0 <= value <= 255:
+            return self._set_bri_raw(value, flush)
+        return self._run(self._brightness_state_params, value, flush=flush)
+
+    def _set_bri_raw(self, value: int, flush: bool = True) -> Dict:
+        """set_brightness() for a value already known to be an int in 0-255 (e.g. in a fade loop)."""
+        return self._apply(_BRI_STATE_PARAMS[value], flush)
+
+    def set_power(self, state: int) -> Dict:
+        """Set Hyperion LEDDEVICE power state (0=Off, 1=On, 2=Toggle)."""
+        return self._run(self._power_state_params, state)
+
+    def set_color(self, r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                  flush: bool = True, duration: int = None) -> Dict:
+        """
+        Set Hyperion to a solid color using RGB values or hex code.
+        Pass flush=False for rapid updates (e.g. a color picker) to have them debounced.
+        With duration (ms), Hyperion clears the color again once it has elapsed.
+        """
+        return self._run(self._color_state_params, r=r, g=g, b=b, w=w, hex=hex, duration=duration, flush=flush)
+
+    def set_effect(self, effect_index: int, speed: int = None, intensity: int = None, 
+                   brightness: int = None, palette: int = None,
+                   # Primary color
+                   r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                   # Secondary color
+                   r2: int = None, g2: int = None, b2: int = None, w2: int = None, hex2: str = None,
+                   # Transition (WLED specific, ignored by Hyperion in this context)
+                   transition: int = 0, flush: bool = True, duration: int = None) -> Dict:
+        """
+        Set Hyperion effect (mapped from WLED effect_index) with optional parameters.
+        Pass flush=False for rapid updates (e.g. speed/intensity sliders) to have them debounced.
+        With duration (ms), Hyperion clears the effect again once it has elapsed.
+        """
+        return self._run(self._effect_state_params, effect_index, speed=speed, intensity=intensity,
+                         brightness=brightness, palette=palette, r=r, g=g, b=b, w=w, hex=hex,
+                         r2=r2, g2=g2, b2=b2, w2=w2, hex2=hex2, transition=transition, duration=duration,
+                         flush=flush)
+
+    def set_preset(self, preset_id: int) -> Dict:
+        """Set a Hyperion state corresponding to a WLED preset ID (via mapping)."""
+        response = self._run(self._preset_state_params, preset_id)
+        # logger.debug("Set Hyperion preset (mapped from WLED ID %s): %s", preset_id, response) # Logging happens in _send_command
         return response
 
+    def set_pixels(self, pixels: Any, brightness: int = None, duration: int = None,
+                   flush: bool = True) -> Dict:
+        """
+        Show individual LED colors, the first one on LED 0. pixels is a sequence of (r, g, b),
+        flat RGB bytes, or a uint8 numpy array shaped (N, 3). brightness (0-255) scales the
+        colors, not Hyperion's global brightness. Pass flush=False when streaming frames to have
+        them debounced.
+        """
+        return self._run(self._pixels_state_params, pixels, brightness=brightness,
+                         duration=duration, flush=flush)
+
+
+class AsyncLEDController(LEDController):
+    """
+    LEDController for asyncio applications. The a-prefixed coroutines mirror the public
+    methods and share the WLED translation, but talk to Hyperion over an asyncio stream,
+    so they never block the event loop. Concurrent calls (e.g. via asyncio.gather) are
+    pipelined on the one connection and matched to their responses by tan.
+    The inherited blocking methods still work, over pooled sockets of their own.
+    """
+
+    READ_LIMIT = 2 ** 20  # serverinfo responses exceed asyncio's default 64 KiB line limit
+
+    def __init__(self, ip_address: Optional[str] = None, port: int = HYPERION_DEFAULT_PORT, **kwargs):
+        super().__init__(ip_address, port, **kwargs)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None  # Created on first use, inside the loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # The loop the stream and lock belong to
+        self._waiting: Dict[int, asyncio.Future] = {}  # tan -> future for its response
+
+    def set_ip(self, ip_address: str, port: Optional[int] = None) -> None:
+        """Update the Hyperion IP address and optionally the port."""
+        self._areset()
+        super().set_ip(ip_address, port)
+
+    async def _aensure_connected(self) -> asyncio.StreamWriter:
+        """Returns the open stream to Hyperion, connecting first if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (e.g. a later asyncio.run()): the old loop's stream,
+            # reader task and lock can't be used from this one
+            self._areset()
+            self._loop = loop
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.ip_address, self.port, limit=self.READ_LIMIT), timeout=self.timeout)
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    _configure_socket(sock)
+                self._reader, self._writer = reader, writer
+                self._reader_task = asyncio.ensure_future(self._read_responses(reader))
+            return self._writer
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        """Hands each response line to the command waiting on its tan."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.endswith(b"\n"):  # Connection closed by peer
+                    raise ConnectionError(f"Connection closed by Hyperion at {self.ip_address}:{self.port}")
+                response_json = _json_loads(line)
+                future = self._waiting.pop(response_json.get("tan"), None)
+                if future is not None and not future.done():
+                    future.set_result(response_json)
+        except asyncio.CancelledError:
+            if self._reader is reader:
+                # Not cancelled by _areset(), so by the event loop shutting down (e.g. the end of
+                # asyncio.run()): close the stream while its loop still runs
+                self._areset()
+            raise
+        except Exception as e:  # Lost connection, oversized line or unparsable data
+            if self._reader is reader:
+                logger.error("Error reading from Hyperion: %s", e)
+                self._areset(e)
+
+    def _areset(self, exc: Optional[Exception] = None) -> None:
+        """Drops the asyncio connection and fails every command still waiting on it."""
+        writer, reader_task = self._writer, self._reader_task
+        self._reader = self._writer = self._reader_task = None
+        self._led_on_cache = None  # Can't trust cached state across a connection problem
+        self._last_known = {}
+        self._status_cache = None
+        if writer is not None and self._loop is not None and self._loop.is_closed():
+            # The transport can't close without its loop, so close the socket it wraps directly
+            # (its own close() then finds it closed)
+            sock = getattr(writer.get_extra_info("socket"), "_sock", None)
+            if sock is not None:
+                sock.close()
+            writer = reader_task = None  # Nothing else can be done on that loop
+        try:
+            if writer is not None:
+                writer.close()
+            if reader_task is not None:
+                try:
+                    current_task = asyncio.current_task()
+                except RuntimeError:  # Called from outside the event loop (e.g. set_ip)
+                    current_task = None
+                if reader_task is not current_task:
+                    reader_task.cancel()
+            waiting, self._waiting = self._waiting, {}
+            for future in waiting.values():
+                if not future.done():
+                    future.set_exception(exc or ConnectionError("Connection to Hyperion closed"))
+        except RuntimeError:  # Their event loop is already closed; nothing left to clean up there
+            pass
+
+    async def aclose(self) -> None:
+        """Close the connections to Hyperion. They are reopened automatically when needed."""
+        writer = self._writer if self._loop is asyncio.get_running_loop() else None  # Others: see _areset()
+        self._areset()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        self.close()
+
+    async def __aenter__(self) -> "AsyncLEDController":
+        return self
 
-# --- Helper Functions (Unchanged, they use the LEDController interface) ---
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _asend_hyperion_batch(self, commands: List[Dict]) -> List[Dict]:
+        """Coroutine version of _send_hyperion_batch()."""
+        if not commands:
+            return []
+        if not self.ip_address:
+            raise ValueError("No Hyperion IP configured")
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for command_obj in commands:
+            if self.auth_token:
+                command_obj["token"] = self.auth_token
+            command_obj["tan"] = self._next_tan()
+        try:
+            writer = await self._aensure_connected()
+            for command_obj in commands:
+                futures.append(loop.create_future())
+                self._waiting[command_obj["tan"]] = futures[-1]
+            writer.writelines(_command_lines(commands))
+            # One deadline for the write (drain() waits while Hyperion isn't reading) and the responses
+            responses = await asyncio.wait_for(self._adrain_and_gather(writer, futures), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._areset()
+            logger.error("Timeout connecting/reading from Hyperion at %s:%s", self.ip_address, self.port)
+            raise ConnectionError(f"Timeout communicating with Hyperion at {self.ip_address}:{self.port}")
+        except ConnectionRefusedError:
+            self._areset()
+            logger.error("Connection refused by Hyperion at %s:%s", self.ip_address, self.port)
+            raise ConnectionRefusedError(f"Connection refused by Hyperion at {self.ip_address}:{self.port}")
+        except ConnectionError:
+            self._areset()
+            raise  # Already logged by the reader
+        except OSError as e:  # Other socket errors (e.g., host not found, network unreachable)
+            self._areset()
+            logger.error("Socket OS error with Hyperion: %s", e)
+            raise ConnectionError(f"Socket OS error with Hyperion: {e}")
+        finally:
+            for command_obj in commands:
+                self._waiting.pop(command_obj["tan"], None)
+
+        self._log_failed_commands(commands, responses)
+        return responses
+
+    @staticmethod
+    async def _adrain_and_gather(writer: asyncio.StreamWriter, futures: List[asyncio.Future]) -> List[Dict]:
+        await writer.drain()
+        return await asyncio.gather(*futures)
+
+    async def _aget_hyperion_serverinfo(self) -> Optional[Dict]:
+        """Coroutine version of _get_hyperion_serverinfo()."""
+        try:
+            response = (await self._asend_hyperion_batch([{"command": "serverinfo"}]))[0]
+            return response.get("info") if response and response.get("success") else None
+        except Exception as e: # Catch exceptions from _asend_hyperion_batch
+            logger.warning("Could not get Hyperion serverinfo: %s", e)
+            return None
+
+    async def _aget_led_on_state(self, max_age: float = 0.5) -> Optional[bool]:
+        """Coroutine version of _get_led_on_state()."""
+        cached = self._led_on_cache
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        return self._led_state_from_serverinfo(await self._aget_hyperion_serverinfo())
+
+    async def _asend_command(self, state_params: Dict = None) -> Dict:
+        """Coroutine version of _send_command()."""
+        if not state_params:
+            return await self.acheck_wled_status()
+        broken = self._breaker_status()
+        if broken is not None:
+            return broken
+        self._status_cache = None
+        try:
+            if not self.ip_address:
+                raise ValueError("No Hyperion IP configured")
+
+            led_on_before = await self._aget_led_on_state()
+            if led_on_before is None and _is_toggle(state_params):
+                led_on_before = await self._aget_led_on_state(max_age=0)
+
+            pending = self._build_hyperion_commands(state_params, led_on_before)
+            responses = await self._asend_hyperion_batch(pending)
+            self._failures = self._trips = 0
+            self._remember_led_state(pending, responses)
+            status = self._status_after_writes(state_params, pending, responses)
+            if status is not None:
+                return status
+
+            final_hyperion_info = await self._aget_hyperion_serverinfo()
+            if final_hyperion_info is None:
+                raise ConnectionError("Failed to get Hyperion serverinfo after command execution.")
+            return self._status_from_serverinfo(final_hyperion_info)
+
+        except Exception as e:
+            return self._failure_status(e)
+
+    async def _arun(self, build_state_params, *args, **kwargs) -> Dict:
+        """Coroutine version of _run()."""
+        try:
+            state_params = build_state_params(*args, **kwargs)
+        except ValueError as e:
+            return {"connected": False, "message": str(e)}
+        return await self._aapply(state_params)
+
+    async def _aapply(self, state_params: Dict) -> Dict:
+        """Coroutine version of _apply(): queues state_params inside cork()/acork(), otherwise sends them."""
+        if self._corked:
+            return self._queue(state_params)
+        queued = self._take_pending()
+        if queued:
+            queued.update(state_params)
+            state_params = queued
+        return await self._asend_command(state_params)
+
+    async def aflush(self) -> Optional[Dict]:
+        """Coroutine version of flush()."""
+        state_params = self._take_pending()
+        if not state_params:
+            return None
+        return await self._asend_command(state_params)
+
+    @contextlib.asynccontextmanager
+    async def acork(self):
+        """
+        Coroutine version of cork(), for async with. The a-prefixed setters inside the block are
+        queued and sent as one command batch, without blocking the event loop, when it exits.
+        They are queued inside cork() as well, but its exit sends them with the blocking methods.
+        """
+        with self._pending_lock:
+            self._corked += 1
+        try:
+            yield self
+        finally:
+            with self._pending_lock:
+                self._corked -= 1
+                corked = self._corked
+            if not corked:
+                status = await self.aflush()
+                if status is not None and not status.get("connected"):
+                    logger.warning("Queued Hyperion update failed: %s", status.get('message'))
+
+    async def asend_batch(self, commands: List[Dict]) -> List[Dict]:
+        """Coroutine version of send_batch()."""
+        message = self._breaker_message()
+        if message is not None:
+            raise ConnectionError(message)
+        self._status_cache = None
+        try:
+            responses = await self._asend_hyperion_batch(commands)
+        except (OSError, json.JSONDecodeError):
+            self._record_failure()
+            raise
+        self._failures = self._trips = 0
+        self._last_known = {}
+        self._remember_led_state(commands, responses)
+        return responses
+
+    async def acheck_wled_status(self) -> Dict:
+        """Coroutine version of check_wled_status()."""
+        cached = self._fresh_status()
+        if cached is not None:
+            return cached
+        broken = self._breaker_status()
+        if broken is not None:
+            return broken
+        try:
+            if not self.ip_address:
+                raise ValueError("No Hyperion IP configured")
+            server_info = await self._aget_hyperion_serverinfo()
+            if server_info is None:
+                raise ConnectionError("Failed to get Hyperion serverinfo after command execution.")
+            self._failures = self._trips = 0
+            return self._cache_status(self._status_from_serverinfo(server_info))
+        except Exception as e:
+            return self._failure_status(e)
+
+    async def aset_brightness(self, value: int) -> Dict:
+        """Coroutine version of set_brightness()."""
+        if type(value) is int and 0 <= value <= 255:
+            return await self._aapply(_BRI_STATE_PARAMS[value])
+        return await self._arun(self._brightness_state_params, value)
+
+    async def aset_power(self, state: int) -> Dict:
+        """Coroutine version of set_power()."""
+        return await self._arun(self._power_state_params, state)
+
+    async def aset_color(self, r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                         duration: int = None) -> Dict:
+        """Coroutine version of set_color()."""
+        return await self._arun(self._color_state_params, r=r, g=g, b=b, w=w, hex=hex, duration=duration)
+
+    async def aset_effect(self, effect_index: int, speed: int = None, intensity: int = None,
+                          brightness: int = None, palette: int = None,
+                          r: int = None, g: int = None, b: int = None, w: int = None, hex: str = None,
+                          r2: int = None, g2: int = None, b2: int = None, w2: int = None, hex2: str = None,
+                          transition: int = 0, duration: int = None) -> Dict:
+        """Coroutine version of set_effect()."""
+        return await self._arun(self._effect_state_params, effect_index, speed=speed, intensity=intensity,
+                                brightness=brightness, palette=palette, r=r, g=g, b=b, w=w, hex=hex,
+                                r2=r2, g2=g2, b2=b2, w2=w2, hex2=hex2, transition=transition,
+                                duration=duration)
+
+    async def aset_preset(self, preset_id: int) -> Dict:
+        """Coroutine version of set_preset()."""
+        return await self._arun(self._preset_state_params, preset_id)
+
+    async def aset_pixels(self, pixels: Any, brightness: int = None, duration: int = None) -> Dict:
+        """Coroutine version of set_pixels()."""
+        return await self._arun(self._pixels_state_params, pixels, brightness=brightness,
+                                duration=duration)
+
+
+def broadcast(controllers: List[LEDController], state_params: Dict) -> List[Dict]:
+    """
+    Applies the same WLED-style state_params through several controllers (e.g. one
+    Hyperion instance per room) in parallel. Returns each controller's status, in order.
+    """
+    if not controllers:
+        return []
+    with ThreadPoolExecutor(max_workers=len(controllers)) as executor:
+        return list(executor.map(lambda controller: controller._send_command(state_params), controllers))
+
+
+# --- Helper Functions (they use the public LEDController / AsyncLEDController interface) ---
+
+# effect_connected()'s blink as (levels above the controller's priority, color, duration ms): Hyperion
+# shows the highest priority, so as each overlay expires it uncovers the next, and finally the idle preset
+_CONNECTED_BLINK: Tuple[Tuple[int, Tuple[int, int, int], int], ...] = (
+    (3, _hex_to_rgb("#08ff00"), 1000),  # Green for 1 s,
+    (2, _hex_to_rgb("#000000"), 1500),  # off for 0.5 s,
+    (1, _hex_to_rgb("#08ff00"), 2500),  # green for 1 s
+)
+
+def _connected_blink_commands(led_controller: LEDController) -> List[Dict]:
+    """The Hyperion color commands that play the 'connected' blink on their own."""
+    return [{"command": "color", "color": color, "duration": duration_ms,
+             "priority": max(1, led_controller.priority - levels), "origin": led_controller.origin}
+            for levels, color, duration_ms in _CONNECTED_BLINK]
 
 def effect_loading(led_controller: LEDController):
     """Activates a 'loading' effect using the LEDController."""
@@ -568,22 +1779,24 @@ def effect_idle(led_controller: LEDController):
 
 
 def effect_connected(led_controller: LEDController):
-    """Plays a short 'connected' animation using the LEDController."""
+    """
+    Plays a short 'connected' animation using the LEDController. Returns right away;
+    the animation runs on Hyperion for 2.5 seconds.
+    """
     # Original WLED Effect 0 (Solid), Green (#08ff00), Brightness 100
     # This now depends on WLED_TO_HYPERION_EFFECT_MAP[0] or how set_color is handled.
     # If effect 0 is "Solid" in Hyperion, it will try to set color [8,255,0] and global brightness.
     res = led_controller.set_effect(effect_index=0, hex='#08ff00', brightness=100)
-    time.sleep(1)
-
-    # Original WLED: Effect 0 (Solid), Brightness 0 (effectively off for that effect color)
-    # For Hyperion adapter: sets effect mapped from WLED ID 0 AND sets global Hyperion brightness to 0.
-    led_controller.set_effect(effect_index=0, brightness=0) # Sets mapped effect and global brightness
-    time.sleep(0.5)
+    if not res.get('connected', False):
+        return False # Hyperion is unreachable (or the breaker is open), don't wait on it twice more
 
-    res = led_controller.set_effect(effect_index=0, hex='#08ff00', brightness=100)
-    time.sleep(1)
+    # The on/off/on steps are timed by Hyperion itself (see _CONNECTED_BLINK), so nothing sleeps here
+    try:
+        led_controller.send_batch(_connected_blink_commands(led_controller))
+    except (ValueError, ConnectionError) as e:
+        logger.warning("Could not play the 'connected' blink on Hyperion: %s", e)
 
-    effect_idle(led_controller) # Switch to idle state
+    effect_idle(led_controller) # Switch to idle state, shown once the blink has expired
     return res.get('is_on', False)
 
 def effect_playing(led_controller: LEDController):
@@ -591,8 +1804,41 @@ def effect_playing(led_controller: LEDController):
     # This depends on WLED_TO_HYPERION_PRESET_MAP[2]
     led_controller.set_preset(2)
 
+# Coroutine versions of the helpers for AsyncLEDController
+async def aeffect_loading(led_controller: AsyncLEDController):
+    """Coroutine version of effect_loading()."""
+    res = await led_controller.aset_effect(effect_index=47, hex='#ffa000', hex2='#000000', palette=0,
+                                           speed=150, intensity=150)
+    return res.get('is_on', False)
+
+async def aeffect_idle(led_controller: AsyncLEDController):
+    """Coroutine version of effect_idle()."""
+    await led_controller.aset_preset(1)
+
+async def aeffect_connected(led_controller: AsyncLEDController):
+    """Coroutine version of effect_connected()."""
+    res = await led_controller.aset_effect(effect_index=0, hex='#08ff00', brightness=100)
+    if not res.get('connected', False):
+        return False
+    try:
+        await led_controller.asend_batch(_connected_blink_commands(led_controller))
+    except (ValueError, ConnectionError) as e:
+        logger.warning("Could not play the 'connected' blink on Hyperion: %s", e)
+    await aeffect_idle(led_controller)
+    return res.get('is_on', False)
+
+async def aeffect_playing(led_controller: AsyncLEDController):
+    """Coroutine version of effect_playing()."""
+    await led_controller.aset_preset(2)
+
 # Example Usage (Optional - for testing)
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Exercise LEDController against a Hyperion instance.")
+    parser.add_argument("--verbose", action="store_true", help="print each returned status in full")
+    parser.add_argument("--sync", action="store_true", help="run the demo with the blocking LEDController")
+    args = parser.parse_args()
+
     # Configure logging for testing
     logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
 
@@ -600,9 +1846,37 @@ if __name__ == '__main__':
     HYPERION_IP = "localhost"  # Or "your_hyperion_ip_address"
     # HYPERION_IP = "192.168.1.100" # Example
 
-    if HYPERION_IP == "localhost" and input("Did you change HYPERION_IP? (y/n): ").lower() != 'y':
-        print("Please set HYPERION_IP to your Hyperion device's IP address in the __main__ block.")
-    else:
+    def show(result):
+        """Prints a returned status (in full with --verbose), a helper's is-on result, or a list of either."""
+        if isinstance(result, list):
+            for item in result:
+                show(item)
+        elif not isinstance(result, dict):
+            print("Hyperion is ON" if result else "Hyperion reported OFF or the call failed")
+        elif args.verbose:
+            print(json.dumps(result, indent=2))
+        else:
+            print(result.get("message"))
+
+    def optional_ops(set_effect, set_preset):
+        """The effect and preset steps, or headings saying why they are skipped."""
+        ops = []
+        # For this to work, WLED_TO_HYPERION_EFFECT_MAP[47] must map to a valid Hyperion effect
+        # that ideally uses "speed", "intensity", and "colors" (or "color") arguments.
+        if 47 in WLED_TO_HYPERION_EFFECT_MAP:
+            ops.append((f"Setting Effect (WLED ID 47 -> Hyperion '{WLED_TO_HYPERION_EFFECT_MAP[47]}')",
+                        functools.partial(set_effect, effect_index=47, speed=100, intensity=200,
+                                          hex="#00FFFF", hex2="#FF00FF"), 5)) # Cyan and magenta
+        else:
+            ops.append(("Skipping effect test: WLED effect ID 47 not mapped in WLED_TO_HYPERION_EFFECT_MAP.", None, 0))
+        if 1 in WLED_TO_HYPERION_PRESET_MAP:
+            ops.append((f"Setting Preset (WLED ID 1 -> Hyperion '{WLED_TO_HYPERION_PRESET_MAP[1]}')",
+                        functools.partial(set_preset, 1), 5))
+        else:
+            ops.append(("Skipping preset test: WLED preset ID 1 not mapped in WLED_TO_HYPERION_PRESET_MAP.", None, 0))
+        return ops
+
+    def sync_demo():
         controller = LEDController(ip_address=HYPERION_IP)
 
         # Optional: If your Hyperion needs an auth token
@@ -611,65 +1885,61 @@ if __name__ == '__main__':
 
         print("--- Checking Hyperion Status ---")
         status = controller.check_wled_status()
-        print(json.dumps(status, indent=2))
-
-        if status.get("connected"):
-            print("\n--- Setting Power ON ---")
-            print(json.dumps(controller.set_power(1), indent=2)) # Turn ON
-            time.sleep(1)
-
-            print("\n--- Setting Brightness to 50% (WLED scale 128) ---")
-            print(json.dumps(controller.set_brightness(128), indent=2))
-            time.sleep(2)
-
-            print("\n--- Setting Color to RED ---")
-            print(json.dumps(controller.set_color(hex="#FF0000"), indent=2))
-            time.sleep(2)
-
-            print("\n--- Setting Color to GREEN ---")
-            print(json.dumps(controller.set_color(r=0, g=255, b=0), indent=2))
-            time.sleep(2)
-            
-            # --- Test an effect (ensure WLED_TO_HYPERION_EFFECT_MAP[47] is set) ---
-            # For this to work, WLED_TO_HYPERION_EFFECT_MAP[47] must map to a valid Hyperion effect
-            # that ideally uses "speed", "intensity", and "colors" (or "color") arguments.
-            if 47 in WLED_TO_HYPERION_EFFECT_MAP:
-                print(f"\n--- Setting Effect (WLED ID 47 -> Hyperion '{WLED_TO_HYPERION_EFFECT_MAP[47]}') ---")
-                print(json.dumps(controller.set_effect(
-                    effect_index=47,
-                    speed=100,
-                    intensity=200,
-                    hex="#00FFFF", # Cyan
-                    hex2="#FF00FF"  # Magenta
-                ), indent=2))
-                time.sleep(5)
-            else:
-                print("\nSkipping effect test: WLED effect ID 47 not mapped in WLED_TO_HYPERION_EFFECT_MAP.")
-
-            # --- Test a preset (ensure WLED_TO_HYPERION_PRESET_MAP[1] is set) ---
-            if 1 in WLED_TO_HYPERION_PRESET_MAP:
-                print(f"\n--- Setting Preset (WLED ID 1 -> Hyperion '{WLED_TO_HYPERION_PRESET_MAP[1]}') ---")
-                print(json.dumps(controller.set_preset(1), indent=2))
-                time.sleep(5)
-            else:
-                print("\nSkipping preset test: WLED preset ID 1 not mapped in WLED_TO_HYPERION_PRESET_MAP.")
-
-
-            print("\n--- Simulating effect_loading ---")
-            if effect_loading(controller):
-                print("effect_loading successful (Hyperion is ON)")
-            else:
-                print("effect_loading reported Hyperion as OFF or failed")
-            time.sleep(5)
-
-            print("\n--- Simulating effect_connected ---")
-            if effect_connected(controller):
-                 print("effect_connected successful (Hyperion is ON at end of sequence part)")
-            else:
-                print("effect_connected reported Hyperion as OFF or failed")
-            # effect_connected already switches to idle at the end.
-
-            print("\n--- Setting Power OFF ---")
-            print(json.dumps(controller.set_power(0), indent=2)) # Turn OFF
-        else:
+        show(status)
+        if not status.get("connected"):
             print(f"Could not connect to Hyperion at {HYPERION_IP} or other error occurred.")
+            return
+
+        # (heading, call or None to only print the heading, seconds to wait afterwards)
+        ops = [
+            ("Setting Power ON", functools.partial(controller.set_power, 1), 1),
+            ("Setting Brightness to 50% (WLED scale 128)", functools.partial(controller.set_brightness, 128), 2),
+            ("Setting Color to RED", functools.partial(controller.set_color, hex="#FF0000"), 2),
+            ("Setting Color to GREEN", functools.partial(controller.set_color, r=0, g=255, b=0), 2),
+            *optional_ops(controller.set_effect, controller.set_preset),
+            ("Simulating effect_loading", functools.partial(effect_loading, controller), 5),
+            # effect_connected returns at once, plays for 2.5 s and then switches to idle
+            ("Simulating effect_connected", functools.partial(effect_connected, controller), 3),
+            ("Setting Power OFF", functools.partial(controller.set_power, 0), 0),
+        ]
+        for heading, call, pause in ops:
+            print(f"\n--- {heading} ---")
+            if call is not None:
+                show(call())
+                time.sleep(pause)
+
+    async def demo():
+        async with AsyncLEDController(ip_address=HYPERION_IP) as controller:
+            # controller.set_auth_token("your_hyperion_auth_token_here")
+
+            print("--- Checking Hyperion Status ---")
+            status = await controller.acheck_wled_status()
+            show(status)
+            if not status.get("connected"):
+                print(f"Could not connect to Hyperion at {HYPERION_IP} or other error occurred.")
+                return
+
+            # As in sync_demo(), but calls return awaitables. Brightness and color don't depend on
+            # each other, so they go out together and share one round-trip's wait.
+            ops = [
+                ("Setting Power ON", functools.partial(controller.aset_power, 1), 1),
+                ("Setting Brightness to 50% (WLED scale 128) and Color to RED",
+                 lambda: asyncio.gather(controller.aset_brightness(128), controller.aset_color(hex="#FF0000")), 2),
+                ("Setting Color to GREEN", functools.partial(controller.aset_color, r=0, g=255, b=0), 2),
+                *optional_ops(controller.aset_effect, controller.aset_preset),
+                ("Simulating effect_loading", functools.partial(aeffect_loading, controller), 5),
+                ("Simulating effect_connected", functools.partial(aeffect_connected, controller), 3),
+                ("Setting Power OFF", functools.partial(controller.aset_power, 0), 0),
+            ]
+            for heading, call, pause in ops:
+                print(f"\n--- {heading} ---")
+                if call is not None:
+                    show(await call())
+                    await asyncio.sleep(pause)
+
+    if HYPERION_IP == "localhost" and input("Did you change HYPERION_IP? (y/n): ").lower() != 'y':
+        print("Please set HYPERION_IP to your Hyperion device's IP address in the __main__ block.")
+    elif args.sync:
+        sync_demo()
+    else:
+        asyncio.run(demo())
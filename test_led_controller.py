@@ -0,0 +1,405 @@
+"""Tests for led_controller, run with: python -m unittest test_led_controller"""
+import asyncio
+import gc
+import importlib.util
+import json
+import socket
+import sys
+import threading
+import time
+import unittest
+import warnings
+from unittest import mock
+
+import led_controller
+
+
+class FakeHyperion:
+    """A minimal Hyperion JSON server on localhost that records the commands it receives."""
+
+    def __init__(self, port=0):
+        self.commands = []
+        self.led_on = True
+        self.brightness = 100 # Hyperion's 0-100 scale
+        self.drop_next = False # Close the connection on the next command instead of answering it
+        self._connections = []
+        self._server = socket.create_server(("127.0.0.1", port))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        """Stops listening and drops the open connections, like a Hyperion restart."""
+        try:
+            self._server.shutdown(socket.SHUT_RDWR) # Wakes the accept() in _serve(); close() alone doesn't
+        except OSError:
+            pass # Already closed
+        self._server.close()
+        for conn in self._connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass # Already closed by the client
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self._connections.append(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn, conn.makefile("rb") as lines:
+            for line in lines:
+                if self.drop_next:
+                    self.drop_next = False
+                    return
+                command = json.loads(line)
+                self.commands.append(command)
+                response = {"command": command["command"], "success": True, "tan": command.get("tan")}
+                if command["command"] == "serverinfo":
+                    response["info"] = {
+                        "components": [{"name": "LEDDEVICE", "enabled": self.led_on}],
+                        "adjustment": [{"brightness": self.brightness}],
+                        "priorities": [],
+                    }
+                elif command["command"] == "componentstate" and command["componentstate"]["component"] == "LEDDEVICE":
+                    self.led_on = command["componentstate"]["state"]
+                elif command["command"] == "adjustment":
+                    self.brightness = command["adjustment"]["brightness"]
+                conn.sendall(json.dumps(response).encode() + b"\n")
+
+    def sent(self, name):
+        """The received commands named name, in order."""
+        return [c for c in self.commands if c["command"] == name]
+
+
+class QueuedUpdateMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def test_duration_is_not_inherited_by_a_queued_color(self):
+        self.controller.set_color(hex="#00ff00", duration=500, flush=False)
+        self.controller.set_color(hex="#0000ff", flush=False)
+        self.controller.flush()
+        colors = self.hyperion.sent("color")
+        self.assertEqual([c["color"] for c in colors], [[0, 0, 255]])
+        self.assertNotIn("duration", colors[0])
+
+    def test_duration_is_not_inherited_inside_cork(self):
+        with self.controller.cork():
+            self.controller.set_effect(47, duration=1000)
+            self.controller.set_color(hex="#123456")
+        colors = self.hyperion.sent("color")
+        self.assertEqual([c["color"] for c in colors], [[0x12, 0x34, 0x56]])
+        self.assertNotIn("duration", colors[0])
+
+    def test_duration_is_sent_with_its_own_update(self):
+        self.controller.set_color(hex="#0000ff", flush=False)
+        self.controller.set_color(hex="#00ff00", duration=500, flush=False)
+        self.controller.flush()
+        self.assertEqual(self.hyperion.sent("color")[-1]["duration"], 500)
+
+    def test_queued_updates_report_a_missing_ip(self):
+        status = led_controller.LEDController().set_color(hex="#ff0000", flush=False)
+        self.assertFalse(status["connected"])
+        self.assertEqual(status["message"], "No Hyperion IP configured")
+
+
+class LedStateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def _componentstate(self, component, state):
+        return self.controller.send_batch([{"command": "componentstate",
+                                            "componentstate": {"component": component, "state": state}}])
+
+    def test_other_components_do_not_change_the_led_state(self):
+        self.controller.set_power(0)
+        self._componentstate("V4L", True)
+        self.controller.set_color(hex="#ff0000")
+        self.assertTrue(self.hyperion.led_on) # Still powered on automatically
+
+    def test_last_is_on_ignores_other_components(self):
+        self.controller.set_power(1)
+        self._componentstate("SMOOTHING", False)
+        self.assertTrue(self.controller.last_is_on)
+
+
+class LargeBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def test_batch_larger_than_iov_max(self):
+        count = led_controller._IOV_MAX * 2 + 1 # sendmsg() takes at most IOV_MAX buffers at once
+        responses = self.controller.send_batch([{"command": "serverinfo"} for _ in range(count)])
+        self.assertEqual(len(responses), count)
+        self.assertTrue(all(response["success"] for response in responses))
+
+
+class SynthesizedStatusTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def test_probe_refreshes_brightness(self):
+        self.assertEqual(self.controller.set_brightness(255)["brightness"], 255)
+        self.hyperion.brightness = 10 # Changed on Hyperion itself
+        time.sleep(0.6) # Past the cached LED state, so set_color() probes serverinfo first
+        self.assertEqual(self.controller.set_color(hex="#ff0000")["brightness"], 26)
+
+    def test_state_is_fetched_again_after_a_connection_failure(self):
+        self.controller.set_brightness(255)
+        self.hyperion.close()
+        self.assertFalse(self.controller.set_color(hex="#ff0000")["connected"])
+        self.hyperion = FakeHyperion(self.hyperion.port) # Back up, with another brightness
+        self.hyperion.brightness = 10
+        self.addCleanup(self.hyperion.close)
+        self.assertEqual(self.controller.set_color(hex="#00ff00")["brightness"], 26)
+
+
+class StaleConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port, timeout=2.0)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def test_retries_once_on_a_new_connection_within_the_deadline(self):
+        self.assertTrue(self.controller.check_wled_status()["connected"]) # Leaves a pooled connection
+        self.controller.status_ttl = 0
+        self.hyperion.drop_next = True # Hyperion closed it while it was idle
+        timeouts = []
+        connection_class = led_controller._HyperionConnection
+
+        def connect(host, port, timeout=3.0):
+            timeouts.append(timeout)
+            return connection_class(host, port, timeout)
+        with mock.patch.object(led_controller, "_HyperionConnection", connect):
+            self.assertTrue(self.controller.check_wled_status()["connected"])
+        self.assertEqual(len(timeouts), 1)
+        self.assertLess(timeouts[0], self.controller.timeout)
+
+
+class SetPixelsTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.LEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+        self.addCleanup(self.controller.close)
+
+    def test_sends_one_flat_color_per_led(self):
+        for pixels in ([(255, 0, 0), (0, 255, 0), (0, 0, 255)], bytes([255, 0, 0, 0, 255, 0, 0, 0, 255])):
+            with self.subTest(pixels=pixels):
+                self.assertTrue(self.controller.set_pixels(pixels)["connected"])
+                command = self.hyperion.sent("color")[-1]
+                self.assertEqual(command["color"], [255, 0, 0, 0, 255, 0, 0, 0, 255])
+                self.assertEqual(command["priority"], self.controller.priority)
+
+    def test_brightness_and_duration(self):
+        self.controller.set_pixels([(255, 128, 0)], brightness=128, duration=200)
+        command = self.hyperion.sent("color")[-1]
+        self.assertEqual(command["color"], [128, 64, 0])
+        self.assertEqual(command["duration"], 200)
+
+    def test_rejects_partial_pixels(self):
+        for pixels in (bytes([1, 2, 3, 4]), [(1, 2, 3, 4)] * 3, [(1, 2, 3), (4, 5)], [(1, 2, 3), 4]):
+            with self.subTest(pixels=pixels):
+                status = self.controller.set_pixels(pixels)
+                self.assertFalse(status["connected"])
+        self.assertEqual(self.hyperion.sent("color"), [])
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        listener.close() # Nothing listens there now, so connecting is refused
+        self.controller = led_controller.LEDController("127.0.0.1", port, failure_threshold=3)
+
+    def _set_brightness(self):
+        with self.assertLogs(led_controller.logger) as logs:
+            status = self.controller.set_brightness(50)
+        return status, logs.output
+
+    def test_counts_one_failure_per_call(self):
+        for _ in range(2):
+            status, logs = self._set_brightness()
+            self.assertFalse(status["connected"])
+            self.assertNotIn("not retrying", status["message"])
+        status, logs = self._set_brightness()
+        self.assertIn("failed 3 times in a row", logs[-1])
+
+    def test_open_breaker_fails_fast_without_logging(self):
+        for _ in range(3):
+            self._set_brightness()
+        with self.assertNoLogs(led_controller.logger):
+            statuses = [self.controller.set_brightness(50), self.controller.check_wled_status()]
+        for status in statuses:
+            self.assertFalse(status["connected"])
+            self.assertIn("not retrying", status["message"])
+
+    def test_queued_updates_report_an_open_breaker(self):
+        for _ in range(3):
+            self._set_brightness()
+        status = self.controller.set_color(hex="#ff0000", flush=False)
+        self.assertFalse(status["connected"])
+        self.assertIn("not retrying", status["message"])
+
+    def test_send_batch_counts_and_respects_the_breaker(self):
+        for _ in range(3):
+            with self.assertLogs(led_controller.logger), self.assertRaises(ConnectionError):
+                self.controller.send_batch([{"command": "serverinfo"}])
+        with self.assertNoLogs(led_controller.logger):
+            with self.assertRaisesRegex(ConnectionError, "not retrying"):
+                self.controller.send_batch([{"command": "serverinfo"}])
+            self.assertFalse(led_controller.effect_connected(self.controller))
+
+    def test_async_helpers_fail_fast(self):
+        controller = led_controller.AsyncLEDController("127.0.0.1", self.controller.port, failure_threshold=3)
+
+        async def run():
+            for _ in range(3):
+                with self.assertLogs(led_controller.logger), self.assertRaises(ConnectionError):
+                    await controller.asend_batch([{"command": "serverinfo"}])
+            with self.assertNoLogs(led_controller.logger):
+                self.assertFalse(await led_controller.aeffect_connected(controller))
+            await controller.aclose()
+        asyncio.run(run())
+
+
+class StdlibJsonTest(unittest.TestCase):
+    """The byte templates used without orjson must encode exactly like the stdlib encoder."""
+
+    @classmethod
+    def setUpClass(cls):
+        spec = importlib.util.spec_from_file_location("led_controller_stdlib_json", led_controller.__file__)
+        cls.module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, {"orjson": None}): # Makes "import orjson" fail
+            spec.loader.exec_module(cls.module)
+
+    def _commands(self, origin):
+        return [
+            {"command": "serverinfo"},
+            {"command": "adjustment", "adjustment": {"brightness": 40}},
+            {"command": "color", "color": [255, 0, 128], "priority": 50, "origin": origin},
+            {"command": "componentstate", "componentstate": {"component": "LEDDEVICE", "state": False}},
+        ]
+
+    def test_templates_match_encoder(self):
+        for token in (None, "secret", "g\u00e9heim \"\u2603\""):
+            for origin in ("LEDController", "K\u00fcche \u2600"):
+                for command in self._commands(origin):
+                    if token is not None:
+                        command["token"] = token
+                    command["tan"] = 7
+                    with self.subTest(command=command):
+                        self.assertIsNotNone(self.module._template_line(command))
+                        self.assertEqual(self.module._json_line(command),
+                                         (self.module._ENCODER(command) + "\n").encode("utf-8"))
+
+    def test_other_shapes_fall_back_to_encoder(self):
+        for command in ({"command": "color", "color": [1, 2, 3.5], "priority": 50, "origin": "x", "tan": 1},
+                        {"command": "color", "color": [1, 2, 3, 4, 5, 6], "priority": 50, "origin": "x", "tan": 1},
+                        {"command": "adjustment", "adjustment": {"brightness": True}, "tan": 1},
+                        {"tan": 1, "command": "serverinfo"}):
+            with self.subTest(command=command):
+                self.assertIsNone(self.module._template_line(command))
+                self.assertEqual(self.module._json_line(command),
+                                 (self.module._ENCODER(command) + "\n").encode("utf-8"))
+
+
+class HelperTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.addCleanup(self.hyperion.close)
+
+    def _blink(self):
+        return [(c["color"], c["duration"]) for c in self.hyperion.sent("color") if "duration" in c]
+
+    def test_effect_connected(self):
+        with led_controller.LEDController("127.0.0.1", self.hyperion.port) as controller:
+            self.assertTrue(led_controller.effect_connected(controller))
+        self.assertEqual(self._blink(), [([8, 255, 0], 1000), ([0, 0, 0], 1500), ([8, 255, 0], 2500)])
+
+    def test_aeffect_connected(self):
+        async def run():
+            async with led_controller.AsyncLEDController("127.0.0.1", self.hyperion.port) as controller:
+                return await led_controller.aeffect_connected(controller)
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(self._blink(), [([8, 255, 0], 1000), ([0, 0, 0], 1500), ([8, 255, 0], 2500)])
+
+
+class AsyncControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.hyperion = FakeHyperion()
+        self.controller = led_controller.AsyncLEDController("127.0.0.1", self.hyperion.port)
+        self.addCleanup(self.hyperion.close)
+
+    async def _burst(self, close):
+        statuses = await asyncio.gather(self.controller.acheck_wled_status(),
+                                        self.controller.aset_brightness(10),
+                                        self.controller.aset_color(r=1))
+        if close:
+            await self.controller.aclose()
+        return statuses
+
+    def test_reusable_across_event_loops(self):
+        for close in (True, False):
+            with self.subTest(aclose=close):
+                for _ in range(2): # A second asyncio.run() gets a new event loop
+                    statuses = asyncio.run(self._burst(close))
+                    self.assertTrue(all(status["connected"] for status in statuses), statuses)
+                asyncio.run(self.controller.aclose())
+
+    def test_acork_queues_until_the_block_exits(self):
+        async def run():
+            async with self.controller.acork():
+                queued = [await self.controller.aset_color(hex="#ff0000"), await self.controller.aset_brightness(64)]
+                sent_inside = self.hyperion.sent("color") + self.hyperion.sent("adjustment")
+            await self.controller.aclose()
+            return queued, sent_inside
+        queued, sent_inside = asyncio.run(run())
+        self.assertTrue(all(status.get("queued") for status in queued), queued)
+        self.assertEqual(sent_inside, [])
+        self.assertEqual([c["color"] for c in self.hyperion.sent("color")], [[255, 0, 0]])
+        self.assertEqual(len(self.hyperion.sent("adjustment")), 1)
+
+    def test_cork_queues_async_setters(self):
+        async def run():
+            with self.controller.cork():
+                status = await self.controller.aset_color(hex="#00ff00")
+                sent_inside = self.hyperion.sent("color")
+            await self.controller.aclose()
+            return status, sent_inside
+        status, sent_inside = asyncio.run(run())
+        self.assertTrue(status.get("queued"), status)
+        self.assertEqual(sent_inside, [])
+        self.assertEqual([c["color"] for c in self.hyperion.sent("color")], [[0, 255, 0]])
+
+    def test_no_socket_left_open_by_a_closed_loop(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.controller.acheck_wled_status())
+            loop.close() # Without cancelling the reader task, unlike asyncio.run()
+            asyncio.run(self.controller.aclose())
+            self.assertTrue(asyncio.run(self._burst(close=True))[0]["connected"])
+            gc.collect()
+        self.assertEqual([str(w.message) for w in caught if "unclosed <socket" in str(w.message)], [])
+
+
+if __name__ == "__main__":
+    unittest.main()